@@ -0,0 +1,109 @@
+# Compares the tokens a search tool result costs in the agent's context before and after output
+# projection: raw JSON vs the projected rows as JSON vs the compact table the search tools now return.
+# Uses a synthetic realtor.com-style search page, or a saved response if one is given.
+# Run from the backend directory: python -m benchmarks.bench_tool_output [path/to/search_response.json]
+import json
+import random
+import sys
+
+from crews.research_crew.tool_output import find_rows, project_item, project_output
+from listing_search import LISTING_FIELDS
+
+LISTINGS = 50
+
+
+def synthetic_listing(i: int) -> dict:
+    rng = random.Random(i)
+    photos = [
+        {
+            "href": f"https://ap.rdcpix.com/{rng.getrandbits(64):x}/l-m{rng.getrandbits(32)}s.jpg",
+            "tags": [{"label": rng.choice(["kitchen", "bedroom", "exterior"]), "probability": rng.random()}],
+        }
+        for _ in range(rng.randint(3, 8))
+    ]
+    return {
+        "property_id": str(9000000000 + i),
+        "listing_id": str(2950000000 + i),
+        "status": "for_sale",
+        "list_price": rng.randrange(250_000, 2_500_000, 1000),
+        "list_date": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T00:00:00Z",
+        "permalink": f"{1000 + i}-Main-St_Springfield_IL_62701_M9{i:08d}",
+        "description": {
+            "beds": rng.randint(1, 6),
+            "baths": rng.randint(1, 4),
+            "baths_consolidated": f"{rng.randint(1, 4)}.5",
+            "sqft": rng.randint(600, 5000),
+            "lot_sqft": rng.randint(2000, 40000),
+            "type": rng.choice(["single_family", "condos", "townhomes"]),
+            "year_built": rng.randint(1900, 2023),
+            "sold_price": None,
+            "sold_date": None,
+            "name": None,
+            "sub_type": None,
+        },
+        "location": {
+            "address": {
+                "line": f"{1000 + i} Main St",
+                "city": "Springfield",
+                "state_code": "IL",
+                "postal_code": "62701",
+                "coordinate": {"lat": 39.78 + rng.random() / 10, "lon": -89.65 + rng.random() / 10},
+            },
+            "county": {"name": "Sangamon", "fips_code": "17167"},
+            "street_view_url": f"https://maps.googleapis.com/maps/api/streetview?location={1000 + i}+Main+St&size=640x480",
+        },
+        "flags": {
+            "is_coming_soon": None, "is_pending": None, "is_foreclosure": None, "is_contingent": None,
+            "is_new_construction": None, "is_new_listing": rng.random() < 0.2, "is_price_reduced": None,
+            "is_plan": None, "is_subdivision": None,
+        },
+        "branding": [{"name": "Example Realty Group", "photo": None, "type": "Office"}],
+        "advertisers": [
+            {"fulfillment_id": str(rng.getrandbits(24)), "name": "Jane Agent", "type": "seller",
+             "email": "agent@example.com", "office": {"name": "Example Realty Group"}}
+        ],
+        "primary_photo": photos[0],
+        "photos": photos,
+        "photo_count": len(photos),
+        "virtual_tours": None,
+        "open_houses": None,
+        "tags": rng.sample(["central_air", "garage_2_or_more", "hardwood_floors", "basement", "fireplace", "updated_kitchen"], 4),
+        "source": {"id": "ILMLS", "agents": [{"office_name": "Example Realty Group"}], "type": "mls"},
+        "lead_attributes": {"show_contact_an_agent": True, "opcity_lead_attributes": {"flip_the_market_enabled": False}},
+    }
+
+
+def count_tokens(text: str):
+    """tiktoken's cl100k_base count when it can be loaded, otherwise the usual ~4 characters per token."""
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("cl100k_base").encode(text)), "cl100k_base"
+    except Exception:
+        return round(len(text) / 4), "chars/4 estimate"
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            response = json.load(f)
+    else:
+        response = {"count": LISTINGS, "total": 950, "properties": [synthetic_listing(i) for i in range(LISTINGS)]}
+
+    rows, extras = find_rows(response)
+    print(f"{len(rows or [])} listings")
+
+    raw = json.dumps(response)
+    rows_json = json.dumps({**extras, "rows": [project_item(row, LISTING_FIELDS) for row in rows or []]})
+    table = project_output(response, LISTING_FIELDS, table=True)
+    table = table if isinstance(table, str) else json.dumps(table)
+
+    raw_tokens, method = count_tokens(raw)
+    print(f"token counts ({method})")
+    for label, text in (("raw JSON", raw), ("projected JSON", rows_json), ("projected table", table)):
+        tokens, _ = count_tokens(text)
+        print(f"{label:16}: {tokens:8d} tokens  {len(text):8d} chars  {raw_tokens / max(tokens, 1):6.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
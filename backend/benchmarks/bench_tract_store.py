@@ -0,0 +1,57 @@
+# Compares the old pandas boolean filter in get_geo_data against the indexed TractStore lookups
+# (single tract, and one batch join for a page of results).
+# Run from the backend directory: python -m benchmarks.bench_tract_store [path/to/NRI_Table.csv]
+import sys
+import timeit
+
+import pandas as pd
+
+from geodeeper_service.tract_store import NRI_CSV_PATH, TractStore
+
+FIELDS = ["ERQK_RISKS", "WFIR_RISKS", "RFLD_RISKS", "CFLD_RISKS", "LNDS_RISKS"]
+LOOKUPS = 200
+BATCH = 50
+
+
+def pandas_filter(tract_data: pd.DataFrame, field_names, tract_fips):
+    # Mirrors the previous get_geo_data implementation
+    tract_data["TRACTFIPS"] = tract_data["TRACTFIPS"].astype(str)
+    filtered_data = tract_data[tract_data["TRACTFIPS"] == str(tract_fips)]
+    return {
+        name: filtered_data[name].values[0] if name in filtered_data.columns else None
+        for name in field_names
+    }
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else NRI_CSV_PATH
+    tract_data = pd.read_csv(csv_path, low_memory=False)
+    store = TractStore.from_dataframe(tract_data)
+    sample = store.fips[:: max(1, len(store) // LOOKUPS)][:LOOKUPS].tolist()
+    print(f"{len(store)} tracts x {len(store.columns)} columns, {len(sample)} lookups")
+
+    pandas_time = timeit.timeit(
+        lambda: [pandas_filter(tract_data, FIELDS, int(f)) for f in sample], number=1
+    )
+    store_time = timeit.timeit(
+        lambda: [store.lookup(f, FIELDS) for f in sample], number=1
+    )
+
+    per_pandas = pandas_time / len(sample) * 1e6
+    per_store = store_time / len(sample) * 1e6
+    print(f"pandas filter : {per_pandas:10.1f} us/lookup")
+    print(f"tract store   : {per_store:10.1f} us/lookup")
+    print(f"speedup       : {per_pandas / per_store:10.1f}x")
+
+    # One page of search results: BATCH tracts x FIELDS in a single join
+    page = sample[:BATCH]
+    pandas_page = timeit.timeit(
+        lambda: [pandas_filter(tract_data, FIELDS, int(f)) for f in page], number=1
+    )
+    store_page = timeit.timeit(lambda: store.lookup_table(page, FIELDS), number=1)
+    print(f"{len(page)}-tract page, pandas filters : {pandas_page * 1e3:8.2f} ms")
+    print(f"{len(page)}-tract page, lookup_table   : {store_page * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
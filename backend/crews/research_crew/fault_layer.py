@@ -0,0 +1,153 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import box
+
+# Quaternary fault lines (USGS Qfault), Washington by default when no fault tiles are built
+FAULT_SOURCE = os.getenv("FAULT_SOURCE", "WA_Qfault_2020_Update_Shapefile")
+# Maps are drawn in web-mercator
+FAULT_CRS = 3857
+# How far nearest_fault_distance looks before reporting no fault nearby
+FAULT_SEARCH_RADIUS_KM = float(os.getenv("FAULT_SEARCH_RADIUS_KM", 100))
+# Fault attributes reported by nearest_fault_distance and the source columns they may come from,
+# matched case-insensitively in order (the WA shapefile and the national Qfault exports differ)
+FAULT_ATTRIBUTES = {
+    "fault_name": ("fault_name", "faultname", "name"),
+    "section_name": ("section_name", "section_na", "sectionname", "section"),
+    "slip_rate": ("slip_rate", "sliprate", "slip_rate_class"),
+    "age": ("age", "age_class", "fault_age"),
+}
+
+
+class FaultLayer:
+    """
+    Fault lines loaded once, already projected to web-mercator, behind an STRtree.
+    Read-only after construction, so one instance can serve concurrent renders.
+    """
+
+    def __init__(self, faults: gpd.GeoDataFrame):
+        self.faults = faults.to_crs(FAULT_CRS).reset_index(drop=True)
+        self.tree = STRtree(self.faults.geometry.values)
+
+    @classmethod
+    def from_file(cls, source: str = FAULT_SOURCE) -> "FaultLayer":
+        return cls(gpd.read_file(source))
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> gpd.GeoDataFrame:
+        """Faults whose geometry intersects the bbox (web-mercator metres), unclipped."""
+        hits = self.tree.query(box(xmin, ymin, xmax, ymax), predicate="intersects")
+        return self.faults.iloc[sorted(hits)]
+
+    def clip(self, xmin: float, ymin: float, xmax: float, ymax: float) -> gpd.GeoDataFrame:
+        """Faults clipped to the bbox (web-mercator metres). Only the nearby segments are touched."""
+        nearby = self.query(xmin, ymin, xmax, ymax)
+        if nearby.empty:
+            return nearby
+        return gpd.clip(nearby, box(xmin, ymin, xmax, ymax))
+
+    def nearest(
+        self, xs: np.ndarray, ys: np.ndarray, max_distance: float
+    ) -> Tuple[gpd.GeoDataFrame, np.ndarray, np.ndarray]:
+        """
+        Nearest fault to each web-mercator point within max_distance (mercator metres).
+        Returns (faults, rows, distances): rows index into faults, -1 / NaN where nothing is in range.
+        """
+        points = shapely.points(xs, ys)
+        rows = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.nan)
+        if len(self.faults) and len(points):
+            (point_idx, fault_idx), dist = self.tree.query_nearest(
+                points, max_distance=max_distance, return_distance=True, all_matches=False
+            )
+            rows[point_idx] = fault_idx
+            distances[point_idx] = dist
+        return self.faults, rows, distances
+
+
+_fault_layer: Optional[FaultLayer] = None
+_fault_layer_lock = threading.Lock()
+
+
+def get_fault_layer():
+    """
+    Loads the fault layer on first use and returns the shared instance.
+    Prefers the nationwide tiled dataset (see fault_tiles) and falls back to reading
+    FAULT_SOURCE whole when no tiles have been built.
+    """
+    global _fault_layer
+    if _fault_layer is None:
+        with _fault_layer_lock:
+            if _fault_layer is None:
+                from .fault_tiles import TiledFaultLayer, load_manifest
+
+                manifest = load_manifest()
+                if manifest is not None:
+                    _fault_layer = TiledFaultLayer(manifest=manifest)
+                else:
+                    _fault_layer = FaultLayer.from_file()
+    return _fault_layer
+
+
+def fault_attribute_columns(columns: Sequence[Any]) -> Dict[str, Any]:
+    """{attribute: source column} for each FAULT_ATTRIBUTES entry found in columns."""
+    by_name = {}
+    for column in columns:
+        by_name.setdefault(str(column).lower(), column)
+    resolved = {}
+    for attribute, aliases in FAULT_ATTRIBUTES.items():
+        for alias in aliases:
+            if alias in by_name:
+                resolved[attribute] = by_name[alias]
+                break
+    return resolved
+
+
+def _attribute(faults: gpd.GeoDataFrame, column: Optional[Any], row: int) -> Optional[str]:
+    if column is None or column not in faults.columns:
+        return None
+    value = faults[column].iloc[row]
+    return None if value is None or value != value else str(value)
+
+
+def nearest_fault_distance(
+    lats: Sequence[float], lons: Sequence[float], max_distance_km: float = FAULT_SEARCH_RADIUS_KM
+) -> List[Dict[str, Any]]:
+    """
+    Distance from each lat/lon to the nearest Quaternary fault, with that fault's name, slip rate
+    and age class. Points with no fault within max_distance_km get distance_km None.
+
+    All points are projected and matched in one vectorized STRtree query. Web-mercator distances
+    are scaled by cos(latitude) back to ground distance, within a few percent of the geodesic
+    distance at the ranges involved.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    points = gpd.GeoSeries.from_xy(lons, lats, crs="EPSG:4326").to_crs(FAULT_CRS)
+    scale = np.cos(np.radians(lats))
+    # The search radius in mercator metres grows with latitude; use the widest and trim per point below
+    max_distance = max_distance_km * 1000 / scale.min() if len(lats) else 0.0
+    faults, rows, distances = get_fault_layer().nearest(points.x.values, points.y.values, max_distance)
+    distances_km = distances * scale / 1000
+    columns = fault_attribute_columns(faults.columns)
+
+    results = []
+    for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+        result = {"latitude": lat, "longitude": lon, "distance_km": None}
+        row = rows[i]
+        if row >= 0 and distances_km[i] <= max_distance_km:
+            result.update(
+                {
+                    "distance_km": round(float(distances_km[i]), 3),
+                    **{
+                        attribute: _attribute(faults, columns.get(attribute), row)
+                        for attribute in FAULT_ATTRIBUTES
+                    },
+                }
+            )
+        results.append(result)
+    return results
@@ -0,0 +1,209 @@
+# Nationwide Quaternary faults split into square web-mercator tiles stored as GeoParquet.
+#
+# Each tile file holds every fault that intersects the tile (unclipped, so a long fault appears in
+# each tile it crosses, deduplicated by TILE_FAULT_ID on read), plus a manifest.json tile index.
+# A map or distance query then reads only the handful of tiles its bbox touches.
+#
+# Build once from the USGS Qfault national dataset (run from the backend directory):
+#   python -m crews.research_crew.fault_tiles path/to/Qfaults_US_Database.shp
+import argparse
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely import STRtree
+from shapely.geometry import box
+
+from .fault_layer import FAULT_CRS, FaultLayer, fault_attribute_columns
+
+FAULT_TILE_DIR = os.getenv("FAULT_TILE_DIR", "fault_tiles")
+# 100 km tiles: a 4 km map window touches 1-4 of them
+FAULT_TILE_SIZE_M = float(os.getenv("FAULT_TILE_SIZE_M", 100_000))
+# Tiles kept loaded per process (least recently used are dropped)
+FAULT_TILE_CACHE_SIZE = int(os.getenv("FAULT_TILE_CACHE_SIZE", 64))
+MANIFEST_NAME = "manifest.json"
+TILE_FORMAT_VERSION = 2
+# Row id stamped on each fault at build time to deduplicate faults stored in several tiles. Kept
+# private so it can't collide with a fault_id (or similar) column the source dataset already has.
+TILE_FAULT_ID = "_tile_fault_id"
+
+
+def tile_key(ix: int, iy: int) -> str:
+    return f"{ix}_{iy}"
+
+
+def tile_range(
+    xmin: float, ymin: float, xmax: float, ymax: float, tile_size: float
+) -> List[Tuple[int, int]]:
+    """Tile (ix, iy) pairs covering a web-mercator bbox."""
+    ix0, ix1 = math.floor(xmin / tile_size), math.floor(xmax / tile_size)
+    iy0, iy1 = math.floor(ymin / tile_size), math.floor(ymax / tile_size)
+    return [(ix, iy) for ix in range(ix0, ix1 + 1) for iy in range(iy0, iy1 + 1)]
+
+
+def build_fault_tiles(
+    source: str, out_dir: str = FAULT_TILE_DIR, tile_size: float = FAULT_TILE_SIZE_M
+) -> Dict[str, Any]:
+    """Splits a fault dataset into GeoParquet tiles under out_dir and writes the tile index."""
+    faults = gpd.read_file(source).to_crs(FAULT_CRS).reset_index(drop=True)
+    faults = faults[~(faults.geometry.is_empty | faults.geometry.isna())].reset_index(drop=True)
+    # Store the attributes nearest_fault_distance reports under their canonical names
+    faults = faults.rename(
+        columns={
+            column: attribute
+            for attribute, column in fault_attribute_columns(faults.columns).items()
+            if attribute not in faults.columns
+        }
+    )
+    faults[TILE_FAULT_ID] = np.arange(len(faults), dtype=np.int64)
+    tree = STRtree(faults.geometry.values)
+
+    os.makedirs(out_dir, exist_ok=True)
+    tiles = {}
+    for ix, iy in tile_range(*faults.total_bounds, tile_size):
+        bounds = (ix * tile_size, iy * tile_size, (ix + 1) * tile_size, (iy + 1) * tile_size)
+        hits = tree.query(box(*bounds), predicate="intersects")
+        if len(hits) == 0:
+            continue
+        key = tile_key(ix, iy)
+        filename = f"{key}.parquet"
+        faults.iloc[np.sort(hits)].to_parquet(os.path.join(out_dir, filename), index=False)
+        tiles[key] = {"file": filename, "bounds": bounds, "count": int(len(hits))}
+
+    manifest = {
+        "version": TILE_FORMAT_VERSION,
+        "crs": FAULT_CRS,
+        "tile_size": tile_size,
+        "source": os.path.basename(source.rstrip("/")),
+        "faults": len(faults),
+        "tiles": tiles,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(tile_dir: str = FAULT_TILE_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(tile_dir, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class TiledFaultLayer:
+    """
+    Reads fault tiles on demand, keeping the most recently used ones loaded as FaultLayers.
+    Exposes the same query/clip interface as FaultLayer.
+    """
+
+    def __init__(
+        self,
+        tile_dir: str = FAULT_TILE_DIR,
+        manifest: Optional[Dict[str, Any]] = None,
+        cache_size: int = FAULT_TILE_CACHE_SIZE,
+    ):
+        self.tile_dir = tile_dir
+        self.manifest = manifest or load_manifest(tile_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No fault tile manifest found in {tile_dir}")
+        if self.manifest.get("version") != TILE_FORMAT_VERSION:
+            raise ValueError(
+                f"Fault tiles in {tile_dir} are format version {self.manifest.get('version')}, "
+                f"expected {TILE_FORMAT_VERSION}; rebuild them with python -m crews.research_crew.fault_tiles"
+            )
+        self.tile_size = self.manifest["tile_size"]
+        self.cache_size = cache_size
+        self._tiles: "OrderedDict[str, FaultLayer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def loaded_tiles(self) -> List[str]:
+        return list(self._tiles)
+
+    def tile(self, key: str) -> Optional[FaultLayer]:
+        """Returns the FaultLayer for a tile key, reading it on first access. None if the tile is empty."""
+        entry = self.manifest["tiles"].get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            layer = self._tiles.get(key)
+            if layer is not None:
+                self._tiles.move_to_end(key)
+                return layer
+        layer = FaultLayer(gpd.read_parquet(os.path.join(self.tile_dir, entry["file"])))
+        with self._lock:
+            self._tiles[key] = layer
+            while len(self._tiles) > self.cache_size:
+                self._tiles.popitem(last=False)
+        return layer
+
+    def tiles_for(self, xmin: float, ymin: float, xmax: float, ymax: float) -> List[FaultLayer]:
+        keys = [tile_key(ix, iy) for ix, iy in tile_range(xmin, ymin, xmax, ymax, self.tile_size)]
+        layers = [self.tile(key) for key in keys]
+        return [layer for layer in layers if layer is not None]
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> gpd.GeoDataFrame:
+        """Faults whose geometry intersects the bbox (web-mercator metres), unclipped."""
+        layers = self.tiles_for(xmin, ymin, xmax, ymax)
+        if not layers:
+            return gpd.GeoDataFrame(geometry=[], crs=FAULT_CRS)
+        parts = [layer.query(xmin, ymin, xmax, ymax) for layer in layers]
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return layers[0].faults.iloc[:0].drop(columns=TILE_FAULT_ID)
+        hits = pd.concat(parts, ignore_index=True)
+        # Faults crossing a tile edge are stored in every tile they touch
+        hits = hits.drop_duplicates(TILE_FAULT_ID).sort_values(TILE_FAULT_ID)
+        return hits.drop(columns=TILE_FAULT_ID).reset_index(drop=True)
+
+    def clip(self, xmin: float, ymin: float, xmax: float, ymax: float) -> gpd.GeoDataFrame:
+        """Faults clipped to the bbox (web-mercator metres)."""
+        nearby = self.query(xmin, ymin, xmax, ymax)
+        if nearby.empty:
+            return nearby
+        return gpd.clip(nearby, box(xmin, ymin, xmax, ymax))
+
+    def nearest(
+        self, xs: np.ndarray, ys: np.ndarray, max_distance: float
+    ) -> Tuple[gpd.GeoDataFrame, np.ndarray, np.ndarray]:
+        """
+        Same as FaultLayer.nearest. Loads the tiles within max_distance of any point, then runs one
+        nearest query over their combined faults.
+        """
+        keys = set()
+        for x, y in zip(xs, ys):
+            keys.update(
+                tile_key(ix, iy)
+                for ix, iy in tile_range(
+                    x - max_distance, y - max_distance, x + max_distance, y + max_distance, self.tile_size
+                )
+            )
+        layers = [layer for layer in (self.tile(key) for key in sorted(keys)) if layer is not None]
+        if not layers:
+            empty = FaultLayer(gpd.GeoDataFrame(geometry=[], crs=FAULT_CRS))
+            return empty.nearest(xs, ys, max_distance)
+        faults = pd.concat([layer.faults for layer in layers], ignore_index=True)
+        faults = faults.drop_duplicates(TILE_FAULT_ID).reset_index(drop=True)
+        return FaultLayer(faults).nearest(xs, ys, max_distance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a Qfault dataset into GeoParquet tiles")
+    parser.add_argument("source", help="Fault shapefile, geodatabase or zip readable by geopandas")
+    parser.add_argument("--out", default=FAULT_TILE_DIR, help="Tile output directory")
+    parser.add_argument(
+        "--tile-size-km", type=float, default=FAULT_TILE_SIZE_M / 1000, help="Tile edge length"
+    )
+    args = parser.parse_args()
+    manifest = build_fault_tiles(args.source, args.out, args.tile_size_km * 1000)
+    print(f"{manifest['faults']} faults in {len(manifest['tiles'])} tiles under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
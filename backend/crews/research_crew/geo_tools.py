@@ -1,12 +1,67 @@
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, ClassVar, Dict, List, Optional, Type
 from pydantic import BaseModel, Field
 from .tool_utils import AsyncBaseTool
 from geodeeper_service.geo_service import (
+    geocode_address,
+    geocode_addresses_batch,
     get_tract_fips_from_address,
     get_long_lat_from_address,
+    get_tract_fips_from_coordinates,
+    get_tract_fips_from_coordinates_batch,
     get_tract_field_names,
+    get_hazard_families,
     get_geo_data,
+    get_geo_data_batch,
+    get_risk_profile,
+    get_risk_profiles,
+    get_nearby_tract_comparison,
 )
+from geodeeper_service.risk_profile import COMBINED_HAZARDS, PROFILE_HAZARDS
+
+
+# -------------------- Tool: Geocode Address --------------------
+class GeocodeAddressInput(BaseModel):
+    address: str = Field(..., description="The address to geocode.")
+
+
+class GeocodeAddressTool(AsyncBaseTool):
+    name: str = "geocode_address"
+    description: str = (
+        "Geocode an address once and get everything at the same time: returns a dict with 'latitude', 'longitude', "
+        "'tract_fips' and 'block_group', or 'error'. Prefer this over calling get_tract_fips_from_address and "
+        "get_long_lat_from_address separately."
+    )
+    args_schema: Type[BaseModel] = GeocodeAddressInput
+
+    async def run_async_code(self, address: str) -> Dict[str, Any]:
+        return await geocode_address(address)
+
+
+# -------------------- Tool: Geocode Many Addresses --------------------
+class GeocodeAddressesBatchInput(BaseModel):
+    addresses: List[str] = Field(..., description="The addresses to geocode.")
+
+
+class GeocodeAddressesBatchTool(AsyncBaseTool):
+    name: str = "geocode_addresses_batch"
+    description: str = (
+        "Geocode a whole list of addresses in one call using the Census batch geocoder. Use this instead of "
+        "geocode_address when there are several properties without coordinates. Returns a pipe-separated table "
+        "with one line per address (in order): address, latitude, longitude, tract_fips, block_group and error."
+    )
+    args_schema: Type[BaseModel] = GeocodeAddressesBatchInput
+    output_fields: ClassVar[Dict[str, str]] = {
+        name: name for name in ("address", "latitude", "longitude", "tract_fips", "block_group", "error")
+    }
+    output_table: ClassVar[bool] = True
+
+    async def run_async_code(self, addresses: List[str]) -> Dict[str, Any]:
+        results = await geocode_addresses_batch(addresses)
+        return {
+            "results": [
+                {"address": address, **result} for address, result in zip(addresses, results)
+            ]
+        }
 
 
 # -------------------- Tool: Get Tract FIPS from Address --------------------
@@ -41,22 +96,79 @@ class GetLongLatFromAddressTool(AsyncBaseTool):
         return await get_long_lat_from_address(address)
 
 
-# -------------------- Tool: Get Tract Field Names --------------------
+# -------------------- Tool: Get Tract FIPS from Coordinates --------------------
+class GetTractFipsFromCoordinatesInput(BaseModel):
+    latitude: float = Field(..., description="Latitude of the property.")
+    longitude: float = Field(..., description="Longitude of the property.")
+
+
+class GetTractFipsFromCoordinatesTool(AsyncBaseTool):
+    name: str = "get_tract_fips_from_coordinates"
+    description: str = (
+        "Get the Census Tract FIPS (GEOID) for a latitude/longitude without calling the geocoder. "
+        "Prefer this over get_tract_fips_from_address whenever the coordinates are already known (e.g. from a listing). "
+        "Returns a dict with 'tract_fips' or 'error'."
+    )
+    args_schema: Type[BaseModel] = GetTractFipsFromCoordinatesInput
+
+    async def run_async_code(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        return await get_tract_fips_from_coordinates(latitude, longitude)
+
+
+class GetTractFipsFromCoordinatesBatchInput(BaseModel):
+    latitudes: List[float] = Field(..., description="Latitudes of the properties.")
+    longitudes: List[float] = Field(
+        ..., description="Longitudes of the properties, in the same order as latitudes."
+    )
 
 
-class EmptyInput(BaseModel):
-    pass
+class GetTractFipsFromCoordinatesBatchTool(AsyncBaseTool):
+    name: str = "get_tract_fips_from_coordinates_batch"
+    description: str = (
+        "Get the Census Tract FIPS for many latitude/longitude pairs in one call. "
+        "Returns a dict with 'tract_fips' (a list in input order, null where no tract was found) or 'error'."
+    )
+    args_schema: Type[BaseModel] = GetTractFipsFromCoordinatesBatchInput
+
+    async def run_async_code(
+        self, latitudes: List[float], longitudes: List[float]
+    ) -> Dict[str, Any]:
+        return await get_tract_fips_from_coordinates_batch(latitudes, longitudes)
+
+
+# -------------------- Tool: Get Tract Field Names --------------------
+class GetTractFieldNamesInput(BaseModel):
+    hazard: Optional[str] = Field(
+        None,
+        description="Hazard prefix or name to get fields for, e.g. 'ERQK' or 'earthquake'.",
+    )
+    metric_type: Optional[str] = Field(
+        None,
+        description="Optional metric type or field suffix to narrow down to, e.g. 'Expected Annual Loss' or 'EAL'.",
+    )
+    keyword: Optional[str] = Field(
+        None, description="Optional words to search for in the field aliases."
+    )
 
 
 class GetTractFieldNamesTool(AsyncBaseTool):
     name: str = "get_tract_field_names"
     description: str = (
-        "Get the field names and aliases from the NRI data dictionary. Returns a list of dicts with 'field_name' and 'field_alias'."
+        "Search the NRI data dictionary for the fields of one hazard family (e.g. hazard='ERQK' or 'earthquake'), "
+        "optionally narrowed by metric_type or keyword. Returns a list of dicts with 'field_name', 'field_alias' and "
+        "'metric_type'. Called with no filters it returns the list of hazard families and their prefixes instead."
     )
-    args_schema: Type[BaseModel] = EmptyInput
+    args_schema: Type[BaseModel] = GetTractFieldNamesInput
 
-    async def run_async_code(self) -> List[Dict[str, Any]]:
-        return await get_tract_field_names()
+    async def run_async_code(
+        self,
+        hazard: Optional[str] = None,
+        metric_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        if not (hazard or metric_type or keyword):
+            return await get_hazard_families()
+        return await get_tract_field_names(hazard, metric_type, keyword)
 
 
 # -------------------- Tool: Get Geo Data for Fields and Tract FIPS --------------------
@@ -80,10 +192,117 @@ class GetGeoDataTool(AsyncBaseTool):
         return await get_geo_data(field_names, tract_fips)
 
 
+# -------------------- Tool: Get Geo Data for Many Tracts --------------------
+class GetGeoDataBatchInput(BaseModel):
+    field_names: List[str] = Field(
+        ..., description="List of field names to get data for."
+    )
+    tract_fips_list: List[str] = Field(
+        ..., description="List of tract FIPS codes to get data for."
+    )
+
+
+class GetGeoDataBatchTool(AsyncBaseTool):
+    name: str = "get_geo_data_batch"
+    description: str = (
+        "Get the data for a list of field names across many tract FIPS in one call. Use this instead of "
+        "repeated get_geo_data calls when checking several properties. Returns a table dict with 'fields', "
+        "'rows' (one row per tract, first value is the tract FIPS) and 'missing' (tracts not found)."
+    )
+    args_schema: Type[BaseModel] = GetGeoDataBatchInput
+
+    async def run_async_code(
+        self, field_names: List[str], tract_fips_list: List[str]
+    ) -> Dict[str, Any]:
+        return await get_geo_data_batch(field_names, tract_fips_list)
+
+
+# -------------------- Tool: Get Risk Profile --------------------
+class GetRiskProfileInput(BaseModel):
+    tract_fips: str = Field(..., description="The tract FIPS code to get the risk profile for.")
+
+
+class GetRiskProfileTool(AsyncBaseTool):
+    name: str = "get_risk_profile"
+    description: str = (
+        "Get the precomputed risk profile for a tract FIPS. For earthquake, landslide, riverine/coastal flood, wildfire "
+        "and hurricane it returns the risk score, NRI rating, national and state percentile and a ready-made 'level' "
+        "(low/medium/high), plus 'deep_dive': the hazards whose score is high enough to need a deeper look. "
+        "'flood' is the higher of riverine and coastal flood ('source' says which), for the output's flood field."
+    )
+    args_schema: Type[BaseModel] = GetRiskProfileInput
+
+    async def run_async_code(self, tract_fips: str) -> Dict[str, Any]:
+        return await get_risk_profile(tract_fips)
+
+
+class GetRiskProfilesInput(BaseModel):
+    tract_fips_list: List[str] = Field(
+        ..., description="The tract FIPS codes to get risk profiles for."
+    )
+
+
+class GetRiskProfilesTool(AsyncBaseTool):
+    name: str = "get_risk_profiles"
+    description: str = (
+        "Get the precomputed risk profiles (same shape as get_risk_profile) for many tract FIPS in one call. "
+        "Returns 'missing' (tracts not found) and a pipe-separated table with one line per tract: deep_dive and "
+        "each hazard's level, score and state_percentile."
+    )
+    args_schema: Type[BaseModel] = GetRiskProfilesInput
+    # One row per tract: level, score and state percentile for each hazard
+    output_fields: ClassVar[Dict[str, str]] = {
+        "tract_fips": "tract_fips",
+        "deep_dive": "deep_dive",
+        **{
+            f"{hazard}_{field}": f"hazards.{hazard}.{field}"
+            for hazard in (*PROFILE_HAZARDS, *COMBINED_HAZARDS)
+            for field in ("level", "score", "state_percentile")
+        },
+    }
+    output_table: ClassVar[bool] = True
+
+    async def run_async_code(self, tract_fips_list: List[str]) -> Dict[str, Any]:
+        return await get_risk_profiles(tract_fips_list)
+
+
+# -------------------- Tool: Compare With Nearby Tracts --------------------
+class GetNearbyTractComparisonInput(BaseModel):
+    tract_fips: str = Field(..., description="The tract FIPS code to compare.")
+    k: int = Field(5, ge=1, le=50, description="Number of nearest tracts to compare with.")
+    field_names: Optional[List[str]] = Field(
+        None,
+        description="Fields to compare. Defaults to the quick-check hazard risk scores (ERQK_RISKS, LNDS_RISKS, ...).",
+    )
+
+
+class GetNearbyTractComparisonTool(AsyncBaseTool):
+    name: str = "get_nearby_tract_comparison"
+    description: str = (
+        "Compare a tract's hazard scores with its k nearest neighbouring tracts in one call, to tell whether a risk "
+        "is unusual for the area. Returns the tract's values, a table of the neighbours (with distance_km) and the "
+        "neighbour mean per field."
+    )
+    args_schema: Type[BaseModel] = GetNearbyTractComparisonInput
+
+    async def run_async_code(
+        self, tract_fips: str, k: int = 5, field_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        return await get_nearby_tract_comparison(tract_fips, k, field_names)
+
+
 # List of all available geo tools
 GEO_TOOLS = [
+    GeocodeAddressTool(),
+    GeocodeAddressesBatchTool(),
     GetTractFipsFromAddressTool(),
     GetLongLatFromAddressTool(),
+    GetTractFipsFromCoordinatesTool(),
+    GetTractFipsFromCoordinatesBatchTool(),
     GetTractFieldNamesTool(),
     GetGeoDataTool(),
+    GetGeoDataBatchTool(),
+    GetRiskProfileTool(),
+    GetRiskProfilesTool(),
+    GetNearbyTractComparisonTool(),
 ]
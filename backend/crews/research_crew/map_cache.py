@@ -0,0 +1,163 @@
+# Cache of rendered property maps, keyed by quantized location, map size and style version
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+MAPS_DIR = "maps"
+# Bump whenever plot_map output changes (colors, basemap, size...) so old renders aren't served
+MAP_STYLE_VERSION = 1
+# 4 decimal places is ~11 m, so listings a few metres apart share one render
+MAP_CACHE_PRECISION = int(os.getenv("MAP_CACHE_PRECISION", 4))
+MAP_CACHE_MAX_FILES = int(os.getenv("MAP_CACHE_MAX_FILES", 2000))
+
+
+class MapCache:
+    """
+    Rendered maps stored as maps/topo_map_<lat>_<lon>_<zoom>km[_<variant>]_v<style>.<ext> with an SQLite index
+    (maps/map_index.sqlite3) tracking last access for LRU eviction past max_files.
+    Concurrent requests for the same key, in this process or another worker, wait on one render.
+    """
+
+    def __init__(
+        self,
+        maps_dir: str = MAPS_DIR,
+        precision: int = MAP_CACHE_PRECISION,
+        max_files: int = MAP_CACHE_MAX_FILES,
+        style_version: int = MAP_STYLE_VERSION,
+    ):
+        self.maps_dir = maps_dir
+        self.precision = precision
+        self.max_files = max_files
+        self.style_version = style_version
+        self._local = threading.local()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_locks_lock = threading.Lock()
+        os.makedirs(os.path.join(maps_dir, ".locks"), exist_ok=True)
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS renders (
+                filename TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                os.path.join(self.maps_dir, "map_index.sqlite3"), timeout=10, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def quantize(self, lat: float, lon: float) -> Tuple[float, float]:
+        return round(float(lat), self.precision), round(float(lon), self.precision)
+
+    def filename(
+        self, lat: float, lon: float, zoomkm: float, ext: str = "png", variant: str = ""
+    ) -> str:
+        lat, lon = self.quantize(lat, lon)
+        p = self.precision
+        variant = f"_{variant}" if variant else ""
+        return f"topo_map_{lat:.{p}f}_{lon:.{p}f}_{zoomkm:g}km{variant}_v{self.style_version}.{ext}"
+
+    def _key_lock(self, filename: str) -> threading.Lock:
+        with self._key_locks_lock:
+            return self._key_locks.setdefault(filename, threading.Lock())
+
+    def _touch(self, filename: str):
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO renders (filename, created_at, accessed_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(filename) DO UPDATE SET accessed_at = excluded.accessed_at",
+            (filename, now, now),
+        )
+
+    def get_or_render(
+        self,
+        lat: float,
+        lon: float,
+        zoomkm: float,
+        render: Callable[[float, float, str], None],
+        ext: str = "png",
+        variant: str = "",
+    ) -> str:
+        """
+        Returns the path of the cached map for this location, calling render(lat, lon, path) with the
+        quantized coordinates on a miss. Only one render per key runs at a time.
+        variant distinguishes renders of the same format with different settings (e.g. dpi).
+        """
+        filename = self.filename(lat, lon, zoomkm, ext, variant)
+        path = os.path.join(self.maps_dir, filename)
+        if os.path.isfile(path):
+            self._touch(filename)
+            return path
+
+        with self._key_lock(filename):
+            lock_path = os.path.join(self.maps_dir, ".locks", f"{filename}.lock")
+            with open(lock_path, "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    # Someone else may have rendered it while we were waiting
+                    if not os.path.isfile(path):
+                        qlat, qlon = self.quantize(lat, lon)
+                        tmp = os.path.join(
+                            self.maps_dir, f".{filename}.{os.getpid()}.{threading.get_ident()}.{ext}"
+                        )
+                        try:
+                            render(qlat, qlon, tmp)
+                            os.replace(tmp, path)
+                        finally:
+                            if os.path.exists(tmp):
+                                os.remove(tmp)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._touch(filename)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Deletes the least recently used renders beyond max_files."""
+        conn = self._connect()
+        (count,) = conn.execute("SELECT COUNT(*) FROM renders").fetchone()
+        if count <= self.max_files:
+            return
+        stale = conn.execute(
+            "SELECT filename FROM renders ORDER BY accessed_at LIMIT ?", (count - self.max_files,)
+        ).fetchall()
+        for (filename,) in stale:
+            for stale_path in (
+                os.path.join(self.maps_dir, filename),
+                os.path.join(self.maps_dir, ".locks", f"{filename}.lock"),
+            ):
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass
+            conn.execute("DELETE FROM renders WHERE filename = ?", (filename,))
+
+
+_map_cache: Optional[MapCache] = None
+_map_cache_lock = threading.Lock()
+
+
+def get_map_cache() -> MapCache:
+    global _map_cache
+    if _map_cache is None:
+        with _map_cache_lock:
+            if _map_cache is None:
+                _map_cache = MapCache()
+    return _map_cache
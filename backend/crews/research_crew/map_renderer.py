@@ -0,0 +1,268 @@
+# Map rendering off the event loop: a process pool of Agg workers drawing with the OO Figure API
+import asyncio
+import multiprocessing.context
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+import geopandas as gpd
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .fault_layer import get_fault_layer
+from .map_cache import MapCache, get_map_cache
+from .tile_cache import add_cached_basemap
+
+MAP_RENDER_WORKERS = int(os.getenv("MAP_RENDER_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+# Renders waiting or running at once; past this, new requests are rejected instead of piling up
+MAP_RENDER_QUEUE_SIZE = int(os.getenv("MAP_RENDER_QUEUE_SIZE", 16))
+MAP_RENDER_TIMEOUT = float(os.getenv("MAP_RENDER_TIMEOUT", 60))
+DEFAULT_ZOOM_KM = 2  # map half-width in km
+DEFAULT_DPI = 300
+# png/webp include the basemap; svg and geojson carry only faults and the point for client-side overlay
+MAP_FORMATS = ("png", "webp", "svg", "geojson")
+
+
+class MapRenderError(RuntimeError):
+    pass
+
+
+class MapRenderBusy(MapRenderError):
+    """The render queue is full."""
+
+
+class MapRenderTimeout(MapRenderError):
+    """A render took longer than the configured timeout."""
+
+
+def _check_deadline(deadline: Optional[float]):
+    if deadline is not None and time.time() > deadline:
+        raise MapRenderTimeout("Map render ran past its deadline")
+
+
+def _map_extent(lat: float, lon: float, zoomkm: float):
+    # Build a GeoDataFrame with the point of interest
+    poi = gpd.GeoSeries.from_xy([lon], [lat], crs="EPSG:4326").to_crs(3857)
+    x, y = poi.geometry.iloc[0].x, poi.geometry.iloc[0].y
+
+    # Construct a square bounding box around the point (Web-Mercator metres)
+    half = zoomkm * 1_000
+    bounds = (x - half, y - half, x + half, y + half)
+
+    # Crop the (already loaded and projected) fault layer
+    faults_clip = get_fault_layer().clip(*bounds)
+    return poi, (x, y), bounds, faults_clip
+
+
+def write_geojson(lat: float, lon: float, outfile: str, zoomkm: float = DEFAULT_ZOOM_KM):
+    """Clipped faults plus the property point as a GeoJSON FeatureCollection in lon/lat."""
+    poi, _, _, faults_clip = _map_extent(lat, lon, zoomkm)
+    faults = faults_clip.to_crs(4326).assign(feature="fault")
+    point = gpd.GeoDataFrame({"feature": ["property"]}, geometry=poi.to_crs(4326), crs=4326)
+    features = pd.concat([faults, point], ignore_index=True)
+    with open(outfile, "w") as f:
+        f.write(features.to_json(drop_id=True, na="drop"))
+
+
+def render_map(
+    lat: float,
+    lon: float,
+    outfile: str,
+    zoomkm: float = DEFAULT_ZOOM_KM,
+    fmt: str = "png",
+    dpi: int = DEFAULT_DPI,
+    deadline: Optional[float] = None,
+):
+    """
+    Draws the topographic fault map centred on lat/lon and saves it to outfile.
+    Uses a standalone Figure with its own Agg canvas, so no pyplot global state is touched.
+    fmt "svg" draws faults and the point only (no raster basemap) to keep the file small.
+    deadline (a time.time() value) bounds the basemap tile fetches; a render that runs past it
+    raises MapRenderTimeout without writing outfile.
+    """
+    if fmt == "geojson":
+        return write_geojson(lat, lon, outfile, zoomkm)
+
+    _, (x, y), (xmin, ymin, xmax, ymax), faults_clip = _map_extent(lat, lon, zoomkm)
+    _check_deadline(deadline)
+
+    # Plot
+    fig = Figure(figsize=(8, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(xmin, xmax)  # 1️⃣ force extent
+    ax.set_ylim(ymin, ymax)
+    ax.set_aspect("equal")  # keep it square
+
+    if not faults_clip.empty:  # 2️⃣ only plot if we have data
+        faults_clip.plot(ax=ax)
+    ax.plot(x, y, "ro")
+
+    if fmt != "svg":
+        # 2) USGS Topo basemap, served from the local tile cache
+        add_cached_basemap(ax, xmin, ymin, xmax, ymax, deadline=deadline)
+
+    _check_deadline(deadline)
+    ax.set_axis_off()
+    fig.tight_layout()
+    fig.savefig(outfile, format=fmt, dpi=dpi, bbox_inches="tight")
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _init_worker():
+    # Load the fault layer once per worker rather than on its first render
+    get_fault_layer()
+
+
+class _RenderWorkerProcess(multiprocessing.context.SpawnProcess):
+    """
+    A spawned render worker that doesn't re-run the parent's __main__. Spawn normally re-imports
+    the main script (main.py, with copilotkit and crewai) in every child; render workers only need
+    this module, which they import anyway to unpickle _init_worker and render_map.
+    """
+
+    @staticmethod
+    def _Popen(process_obj):
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            return multiprocessing.context.SpawnProcess._Popen(process_obj)
+        finally:
+            sys.modules["__main__"] = main
+
+
+class _RenderWorkerContext(multiprocessing.context.SpawnContext):
+    Process = _RenderWorkerProcess
+
+
+class MapRenderService:
+    """
+    Renders maps in a pool of worker processes so several properties can be drawn in parallel
+    without blocking the caller's thread or event loop. Results go through the MapCache, so a
+    location already on disk never reaches the pool.
+    """
+
+    def __init__(
+        self,
+        workers: int = MAP_RENDER_WORKERS,
+        queue_size: int = MAP_RENDER_QUEUE_SIZE,
+        timeout: float = MAP_RENDER_TIMEOUT,
+        cache: Optional[MapCache] = None,
+    ):
+        self.timeout = timeout
+        self.cache = cache or get_map_cache()
+        # spawn: workers shouldn't inherit the server's threads, sockets or sqlite handles
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_RenderWorkerContext(),
+            initializer=_init_worker,
+        )
+        self._slots = threading.BoundedSemaphore(queue_size)
+
+    def _render_in_pool(self, lat: float, lon: float, outfile: str, zoomkm: float, fmt: str, dpi: int):
+        if not self._slots.acquire(blocking=False):
+            raise MapRenderBusy("Map renderer is busy, try again shortly")
+        # The worker writes to a path of its own, moved into place only if we are still waiting, so
+        # a render finishing after its timeout can't leave a file behind or clobber a retry's output
+        worker_file = f"{outfile}.{uuid.uuid4().hex}"
+        deadline = time.time() + self.timeout
+        try:
+            future = self._executor.submit(
+                render_map, lat, lon, worker_file, zoomkm, fmt, dpi, deadline
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        # A running process-pool task can't be cancelled, so the slot is held until the worker is
+        # actually done, keeping the queue size a real bound on outstanding renders
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            future.add_done_callback(lambda _: _remove(worker_file))
+            raise MapRenderTimeout(f"Map render timed out after {self.timeout:g}s")
+        except BaseException:
+            _remove(worker_file)
+            raise
+        os.replace(worker_file, outfile)
+
+    def render(
+        self,
+        lat: float,
+        lon: float,
+        zoomkm: float = DEFAULT_ZOOM_KM,
+        fmt: str = "png",
+        dpi: int = DEFAULT_DPI,
+    ) -> str:
+        """Blocking render. Returns the path of the (possibly cached) map file."""
+        if fmt not in MAP_FORMATS:
+            raise ValueError(f"Unsupported map format {fmt!r}, expected one of {', '.join(MAP_FORMATS)}")
+        if fmt == "geojson":
+            # No drawing involved, cheap enough to do on the calling thread
+            return self.cache.get_or_render(
+                lat,
+                lon,
+                zoomkm,
+                lambda qlat, qlon, outfile: write_geojson(qlat, qlon, outfile, zoomkm),
+                ext=fmt,
+            )
+        return self.cache.get_or_render(
+            lat,
+            lon,
+            zoomkm,
+            lambda qlat, qlon, outfile: self._render_in_pool(qlat, qlon, outfile, zoomkm, fmt, dpi),
+            ext=fmt,
+            # svg is resolution independent
+            variant="" if fmt == "svg" else f"{dpi}dpi",
+        )
+
+    async def render_async(
+        self,
+        lat: float,
+        lon: float,
+        zoomkm: float = DEFAULT_ZOOM_KM,
+        fmt: str = "png",
+        dpi: int = DEFAULT_DPI,
+    ) -> str:
+        """Same as render, awaited from an event loop without blocking it."""
+        return await asyncio.to_thread(self.render, lat, lon, zoomkm, fmt, dpi)
+
+    def shutdown(self, wait: bool = True):
+        """Drops queued renders and stops the workers, by default waiting for them to exit."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_render_service: Optional[MapRenderService] = None
+_render_service_lock = threading.Lock()
+
+
+def get_map_render_service() -> MapRenderService:
+    global _render_service
+    if _render_service is None:
+        with _render_service_lock:
+            if _render_service is None:
+                _render_service = MapRenderService()
+    return _render_service
+
+
+def shutdown_render_pool():
+    """Stops the shared render service's workers (app shutdown). A later render starts a new pool."""
+    global _render_service
+    with _render_service_lock:
+        service, _render_service = _render_service, None
+    if service is not None:
+        service.shutdown()
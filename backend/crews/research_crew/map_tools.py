@@ -1,69 +1,25 @@
-import geopandas as gpd
-import contextily as ctx
-import matplotlib.pyplot as plt
-from shapely.geometry import box
 import base64, io
-import os
-from typing import Optional, Type
+from typing import List, Literal, Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 from .tool_utils import AsyncBaseTool
+from .map_renderer import DEFAULT_DPI, get_map_render_service
+from .fault_layer import FAULT_SEARCH_RADIUS_KM, nearest_fault_distance
 
 
-def plot_map(lat, lon):
+def plot_map(lat, lon, fmt="png", dpi=DEFAULT_DPI):
     # ---- user inputs ---------------------------------------------------------
     # lat, lon   = 47.6062, -122.3321          # Seattle, WA
     # lat, lon = 47.615747, -122.322268
     zoomkm = 2  # map half-width in km
-    fault_zip = "WA_Qfault_2020_Update_Shapefile"  # or the nationwide file
-
-    # Create maps directory if it doesn't exist
-    os.makedirs("maps", exist_ok=True)
-
-    # Create a filename with coordinates
-    filename = f"topo_map_{lat}_{lon}.png"
-    outfile = os.path.join("maps", filename)
     # --------------------------------------------------------------------------
 
-    # Build a GeoDataFrame with the point of interest
-    poi = gpd.GeoSeries.from_xy([lon], [lat], crs="EPSG:4326").to_crs(3857)
-    x, y = poi.geometry.iloc[0].x, poi.geometry.iloc[0].y
-
-    # Construct a square bounding box around the point (Web-Mercator metres)
-    half = zoomkm * 1_000
-    xmin, ymin, xmax, ymax = x - half, y - half, x + half, y + half
-    bbox = box(xmin, ymin, xmax, ymax)
-    bbox_gdf = gpd.GeoDataFrame(geometry=[bbox], crs=3857)
-
-    # Read and crop the fault layer
-    faults = gpd.read_file(fault_zip)
-    faults = faults.to_crs(3857)  # match web-mercator
-    faults_clip = gpd.clip(faults, bbox_gdf)
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(8, 8))
-    ax.set_xlim(xmin, xmax)  # 1️⃣ force extent
-    ax.set_ylim(ymin, ymax)
-    ax.set_aspect("equal")  # keep it square
-
-    if not faults_clip.empty:  # 2️⃣ only plot if we have data
-        faults_clip.plot(ax=ax)
-    ax.plot(poi.geometry.iloc[0].x, poi.geometry.iloc[0].y, "ro")
-
-    # 2) Use a light-gray basemap instead of US Topo
-    ctx.add_basemap(
-        ax,
-        source="https://basemap.nationalmap.gov/arcgis/rest/services/USGSTopo/MapServer/tile/{z}/{y}/{x}",
-        crs=3857,
-        attribution="USGS National Map",
-    )
+    # Rendered in a worker process; nearby/repeat locations reuse the cached image
+    return get_map_render_service().render(lat, lon, zoomkm, fmt, dpi)
 
-    ax.set_axis_off()
-    plt.tight_layout()
-    plt.savefig(outfile, dpi=300, bbox_inches="tight")
-    plt.close()
 
-    return outfile
+async def plot_map_async(lat, lon, zoomkm=2, fmt="png", dpi=DEFAULT_DPI):
+    return await get_map_render_service().render_async(lat, lon, zoomkm, fmt, dpi)
 
 
 # Input schema for the PlotMapTool
@@ -72,33 +28,45 @@ class PlotMapInput(BaseModel):
 
     latitude: float = Field(..., description="Latitude coordinate for the map center")
     longitude: float = Field(..., description="Longitude coordinate for the map center")
+    output_format: Literal["png", "webp", "svg", "geojson"] = Field(
+        "png",
+        description=(
+            "png/webp: raster map with topo basemap. svg: faults and point only, no basemap. "
+            "geojson: clipped faults and the point as features for overlaying on another map"
+        ),
+    )
+    dpi: int = Field(DEFAULT_DPI, ge=50, le=600, description="Resolution for png/webp output")
 
 
 # CrewAI tool that wraps the plot_map function
-class PlotMapTool(BaseTool):
+class PlotMapTool(AsyncBaseTool):
     name: str = "plot_map"
     description: str = (
         "Create a topographic map centered at specific coordinates showing geological fault lines"
     )
     args_schema: Type[BaseModel] = PlotMapInput
 
-    def _run(
+    async def run_async_code(
         self,
         latitude: float,
         longitude: float,
+        output_format: str = "png",
+        dpi: int = DEFAULT_DPI,
     ) -> str:
         """Create a map centered at the specified coordinates.
 
         Args:
             latitude: Latitude coordinate for the map center
             longitude: Longitude coordinate for the map center
+            output_format: png, webp, svg or geojson
+            dpi: Resolution for raster output
 
         Returns:
-            str: Path to the saved map image file
+            str: Path to the saved map file
         """
         try:
-            # Call the original plot_map function
-            result = plot_map(latitude, longitude)
+            # Render off this thread in the map worker pool
+            result = await plot_map_async(latitude, longitude, fmt=output_format, dpi=dpi)
 
             # Return the path to the saved file
             return result
@@ -106,7 +74,45 @@ class PlotMapTool(BaseTool):
             return f"Error creating map: {str(e)}"
 
 
+# -------------------- Tool: NearestFaultDistance --------------------
+class NearestFaultDistanceInput(BaseModel):
+    """Input schema for nearest fault distance lookups."""
+
+    latitudes: List[float] = Field(..., description="Latitudes of the properties")
+    longitudes: List[float] = Field(..., description="Longitudes of the properties, same order as latitudes")
+    max_distance_km: float = Field(
+        FAULT_SEARCH_RADIUS_KM, gt=0, description="Search radius; farther faults are reported as none nearby"
+    )
+
+
+class NearestFaultDistanceTool(BaseTool):
+    name: str = "nearest_fault_distance"
+    description: str = (
+        "Distance in km from each property to the nearest Quaternary fault, with the fault's name, "
+        "slip rate and age class. Takes many coordinates at once; use this instead of reading fault "
+        "proximity off a map image."
+    )
+    args_schema: Type[BaseModel] = NearestFaultDistanceInput
+
+    def _run(
+        self,
+        latitudes: List[float],
+        longitudes: List[float],
+        max_distance_km: float = FAULT_SEARCH_RADIUS_KM,
+    ) -> dict:
+        if len(latitudes) != len(longitudes):
+            return {"error": "latitudes and longitudes must have the same length"}
+        try:
+            return {
+                "max_distance_km": max_distance_km,
+                "results": nearest_fault_distance(latitudes, longitudes, max_distance_km),
+            }
+        except Exception as e:
+            return {"error": f"Error computing fault distances: {str(e)}"}
+
+
 # List of all available map tools
 MAP_TOOLS = [
     PlotMapTool(),
+    NearestFaultDistanceTool(),
 ]
@@ -1,34 +1,15 @@
 from enum import Enum
-from typing import Any, Dict, Optional, Type
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Type
 import os
 import urllib.parse
-import requests
 
-import httpx
-from config import settings
 from pydantic import BaseModel, Field
+from http_client import get_http_client
+from rapid_api import call_rapid_api
+from listing_search import LISTING_FIELDS, PROPERTY_DETAIL_FIELDS, SEARCH_MAX_TOTAL, search_endpoint, search_listings
+from property_batch import PROPERTY_BATCH_MAX_IDS, fetch_properties
 from .tool_utils import AsyncBaseTool
 
-# Base URL for RapidAPI Realtor API
-BASE_URL = "https://realtor16.p.rapidapi.com"
-
-# Helper function to make authenticated requests to RapidAPI
-async def call_rapid_api(endpoint: str, params: Dict[str, Any] = None):
-    """Make an authenticated request to RapidAPI."""
-    url = f"{BASE_URL}{endpoint}"
-    headers = {
-        "X-RapidAPI-Key": settings.RAPIDAPI_KEY,
-        "X-RapidAPI-Host": settings.RAPIDAPI_HOST,
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-
-        if response.status_code != 200:
-            raise Exception(f"RapidAPI error: {response.text}")
-
-        return response.json()
-
 
 # Enum for sorting options
 class SortOption(str, Enum):
@@ -55,6 +36,73 @@ class PropertyStatus(str, Enum):
     SOLD = "sold"
 
 
+# -------------------- Output Fields --------------------
+# What the agent gets back from the agent and market tools (see tool_output.get_path for the paths).
+# Listing and property detail fields live in listing_search.
+
+AGENT_FIELDS = {
+    "advertiser_id": "advertiser_id|fulfillment_id|id",
+    "name": "full_name|name|person_name",
+    "office": "office.name|broker.name",
+    "phone": "phones.0.number|phone",
+    "email": "email",
+    "rating": "agent_rating|rating",
+    "reviews": "review_count",
+    "recommendations": "recommendations_count",
+    "for_sale": "for_sale_price.count|for_sale.count",
+    "recently_sold": "recently_sold.count",
+    "areas": "served_areas.*.name",
+    "specializations": "specializations.*.name",
+    "experience_years": "experience|years_experience",
+}
+
+AGENT_REVIEW_FIELDS = {
+    "rating": "rating|overall_rating",
+    "date": "started_timestamp|date|created_at",
+    "reviewer": "display_name|reviewer.name|reviewer_name",
+    "comment": "comment|review|text",
+}
+
+MARKET_FIELDS = {
+    "location": "name|slug_id|city",
+    "median_listing_price": "median_listing_price|market_trends.median_listing_price",
+    "median_sold_price": "median_sold_price|market_trends.median_sold_price",
+    "median_price_per_sqft": "median_listing_price_sqft|median_price_per_sqft|market_trends.median_listing_price_sqft",
+    "median_days_on_market": "median_days_on_market|market_trends.median_days_on_market",
+    "sold_to_listing_ratio": "sold_to_listing_ratio|market_trends.sold_to_listing_ratio",
+    "for_sale_count": "for_sale_count|active_listing_count|market_trends.active_listing_count",
+    "median_rent": "median_rent_price|market_trends.median_rent_price",
+    "hotness": "hotness_score|market_trends.hotness_score",
+}
+
+
+# Flood/fire/heat/wind/air factor scores from the environment risk endpoint
+PROPERTY_RISK_FIELDS = {
+    "flood_factor": "local.flood.flood_factor_score|flood.flood_factor_score",
+    "fema_zone": "local.flood.fema_zone|flood.fema_zone",
+    "fire_factor": "local.wildfire.fire_factor_score|wildfire.fire_factor_score",
+    "heat_factor": "local.heat.heat_factor_score|heat.heat_factor_score",
+    "wind_factor": "local.wind.wind_factor_score|wind.wind_factor_score",
+    "air_factor": "local.air.air_factor_score|air.air_factor_score",
+    "noise": "local.noise.score|noise.score",
+}
+
+# One table row per property in a batch: its details, photo URLs and risk scores side by side.
+# The long description text and feature list are left to get_property_details.
+PROPERTY_BATCH_FIELDS = {
+    "property_id": "property_id",
+    "ok": "ok",
+    "details": {
+        name: path
+        for name, path in PROPERTY_DETAIL_FIELDS.items()
+        if name not in ("property_id", "photos", "text", "features")
+    },
+    "photos": {"photo_urls": "photos.*.href"},
+    "environment_risk": PROPERTY_RISK_FIELDS,
+    "errors": "errors",
+}
+
+
 # -------------------- For Sale Listings Tools --------------------
 
 
@@ -80,6 +128,8 @@ class SearchForSaleTool(AsyncBaseTool):
         "Search for properties that are for sale based on location. Sort options: relevant, newest, price_high_to_low, price_low_to_high, sqft_high_to_low, sqft_low_to_high"
     )
     args_schema: Type[BaseModel] = SearchForSaleInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -121,6 +171,8 @@ class SearchForSaleCoordinatesTool(AsyncBaseTool):
     name: str = "search_properties_for_sale_by_coordinates"
     description: str = "Search for properties for sale based on geographic coordinates"
     args_schema: Type[BaseModel] = SearchForSaleCoordinatesInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -171,6 +223,8 @@ class SearchForRentTool(AsyncBaseTool):
     name: str = "search_properties_for_rent"
     description: str = "Search for properties that are for rent based on location"
     args_schema: Type[BaseModel] = SearchForRentInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -212,6 +266,8 @@ class SearchForRentCoordinatesTool(AsyncBaseTool):
     name: str = "search_properties_for_rent_by_coordinates"
     description: str = "Search for rental properties based on geographic coordinates"
     args_schema: Type[BaseModel] = SearchForRentCoordinatesInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -262,6 +318,8 @@ class SearchForSoldTool(AsyncBaseTool):
     name: str = "search_properties_sold"
     description: str = "Search for properties that have been sold based on location"
     args_schema: Type[BaseModel] = SearchForSoldInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -283,6 +341,62 @@ class SearchForSoldTool(AsyncBaseTool):
         return await call_rapid_api("/search/forsold", params)
 
 
+# -------------------- Aggregated Search Tool --------------------
+
+
+class SearchPropertiesAggregatedInput(BaseModel):
+    """Input schema for collecting many listings across pages in one call."""
+
+    listing_type: ListingType = Field(
+        ListingType.FORSALE, description="forsale, forrent or sold (all is not supported here)"
+    )
+    location: Optional[str] = Field(None, description="Location for searching properties")
+    latitude: Optional[float] = Field(None, description="Latitude, to search around coordinates instead of a location")
+    longitude: Optional[float] = Field(None, description="Longitude, to search around coordinates instead of a location")
+    radius: int = Field(10, ge=1, le=50, description="Radius in kilometers around the coordinates (max: 50)")
+    search_radius: int = Field(0, ge=0, le=50, description="Radius in kilometers around the location (max: 50)")
+    sort: SortOption = Field(SortOption.RELEVANT, description="Sorting option for the results")
+    total: int = Field(
+        200, ge=1, le=SEARCH_MAX_TOTAL, description=f"How many listings to collect (max: {SEARCH_MAX_TOTAL})"
+    )
+
+
+class SearchPropertiesAggregatedTool(AsyncBaseTool):
+    name: str = "search_properties_aggregated"
+    description: str = (
+        "Collect up to 1000 listings for a location or coordinates in one call. Fetches all the pages needed "
+        "in parallel and removes duplicates, so there is no need to page through the search tools one page at a time. "
+        "If 'failed_pages' is not empty, some pages could not be fetched and the listings are incomplete."
+    )
+    args_schema: Type[BaseModel] = SearchPropertiesAggregatedInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
+
+    async def run_async_code(
+        self,
+        listing_type: ListingType = ListingType.FORSALE,
+        location: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        radius: int = 10,
+        search_radius: int = 0,
+        sort: SortOption = SortOption.RELEVANT,
+        total: int = 200,
+    ) -> Dict[str, Any]:
+        """Collect listings across pages for a location or coordinates."""
+        coordinates = latitude is not None and longitude is not None
+        if not coordinates and not location:
+            raise ValueError("Either location or latitude and longitude must be provided")
+
+        endpoint = search_endpoint(ListingType(listing_type).value, coordinates)
+        if coordinates:
+            params = {"latitude": latitude, "longitude": longitude, "radius": radius, "sort": sort}
+        else:
+            params = {"location": location, "search_radius": search_radius, "sort": sort}
+
+        return await search_listings(endpoint, params, total)
+
+
 # -------------------- Suggestions Tool --------------------
 
 
@@ -321,6 +435,8 @@ class SearchAgentsTool(AsyncBaseTool):
         "Search for real estate agents by location and optionally by name"
     )
     args_schema: Type[BaseModel] = SearchAgentsInput
+    output_fields: ClassVar[Dict[str, str]] = AGENT_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self, location: str, name: Optional[str] = None, limit: int = 50, page: int = 1
@@ -349,6 +465,7 @@ class GetAgentProfileTool(AsyncBaseTool):
         "Get detailed profile information for a specific real estate agent"
     )
     args_schema: Type[BaseModel] = GetAgentProfileInput
+    output_fields: ClassVar[Dict[str, str]] = AGENT_FIELDS
 
     async def run_async_code(self, advertiser_id: str) -> Dict[str, Any]:
         """Get detailed profile information for a specific agent."""
@@ -366,6 +483,8 @@ class GetAgentReviewsTool(AsyncBaseTool):
     name: str = "get_agent_reviews"
     description: str = "Get customer reviews for a specific real estate agent"
     args_schema: Type[BaseModel] = GetAgentReviewsInput
+    output_fields: ClassVar[Dict[str, str]] = AGENT_REVIEW_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(self, advertiser_id: str) -> Dict[str, Any]:
         """Get reviews for a specific agent."""
@@ -385,6 +504,8 @@ class GetAgentListingsTool(AsyncBaseTool):
     name: str = "get_agent_listings"
     description: str = "Get property listings managed by a specific real estate agent"
     args_schema: Type[BaseModel] = GetAgentListingsInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self, advertiser_id: str, page: int = 1, type: ListingType = ListingType.ALL
@@ -412,6 +533,7 @@ class GetPropertyDetailsTool(AsyncBaseTool):
     name: str = "get_property_details"
     description: str = "Get detailed information for a specific property by ID or URL"
     args_schema: Type[BaseModel] = GetPropertyDetailsInput
+    output_fields: ClassVar[Dict[str, str]] = PROPERTY_DETAIL_FIELDS
 
     async def run_async_code(
         self, property_id: Optional[str] = None, url: Optional[str] = None
@@ -440,6 +562,8 @@ class GetPropertyPhotosTool(AsyncBaseTool):
     name: str = "get_property_photos"
     description: str = "Get photos for a specific property by ID or URL"
     args_schema: Type[BaseModel] = GetPropertyPhotosInput
+    output_fields: ClassVar[Dict[str, str]] = {"href": "href", "tags": "tags.0.label"}
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self, property_id: Optional[str] = None, url: Optional[str] = None
@@ -487,6 +611,36 @@ class GetPropertyEnvironmentRiskTool(AsyncBaseTool):
         return await call_rapid_api("/property/environment_risk", params)
 
 
+class GetPropertiesBatchInput(BaseModel):
+    """Input schema for getting details, photos and/or environmental risk for many properties."""
+
+    property_ids: List[str] = Field(
+        ..., description=f"IDs of the properties (max: {PROPERTY_BATCH_MAX_IDS})"
+    )
+    include: List[Literal["details", "photos", "environment_risk"]] = Field(
+        ["details"], description="What to fetch for each property: details, photos and/or environment_risk"
+    )
+
+
+class GetPropertiesBatchTool(AsyncBaseTool):
+    name: str = "get_properties_batch"
+    description: str = (
+        f"Get details, photos and/or environmental risk for up to {PROPERTY_BATCH_MAX_IDS} properties in one call. "
+        "Use this instead of calling get_property_details, get_property_photos or get_property_environment_risk "
+        "once per property. Returns a pipe-separated table with one line per property ID: the requested parts' "
+        "fields, 'ok', and 'errors' for any part that failed."
+    )
+    args_schema: Type[BaseModel] = GetPropertiesBatchInput
+    output_fields: ClassVar[Dict[str, Any]] = PROPERTY_BATCH_FIELDS
+    output_table: ClassVar[bool] = True
+
+    async def run_async_code(
+        self, property_ids: List[str], include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get the included parts for many properties."""
+        return await fetch_properties(property_ids, include or ["details"])
+
+
 class GetSimilarHomesInput(BaseModel):
     """Input schema for getting similar homes."""
 
@@ -501,6 +655,8 @@ class GetSimilarHomesTool(AsyncBaseTool):
     name: str = "get_similar_homes"
     description: str = "Get similar homes for a specific property by ID or URL"
     args_schema: Type[BaseModel] = GetSimilarHomesInput
+    output_fields: ClassVar[Dict[str, str]] = LISTING_FIELDS
+    output_table: ClassVar[bool] = True
 
     async def run_async_code(
         self,
@@ -541,6 +697,7 @@ class GetHousingMarketDetailsTool(AsyncBaseTool):
         "Get housing market details for a location by slug ID or location name"
     )
     args_schema: Type[BaseModel] = GetHousingMarketDetailsInput
+    output_fields: ClassVar[Dict[str, str]] = MARKET_FIELDS
 
     async def run_async_code(
         self, slug_id: Optional[str] = None, location: Optional[str] = None
@@ -584,7 +741,7 @@ class WalkScoreTool(AsyncBaseTool):
         )
 
         try:
-            response = requests.get(url, timeout=10)
+            response = await get_http_client().get(url, timeout=10)
             response.raise_for_status()
             data = response.json()
             return (
@@ -623,10 +780,9 @@ class GooglePlacesTool(AsyncBaseTool):
             "key": api_key,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        response = await get_http_client().get(url, params=params)
+        response.raise_for_status()
+        return response.json()
 
 
 
@@ -637,6 +793,7 @@ REALTOR_TOOLS = [
     SearchForRentTool(),
     SearchForRentCoordinatesTool(),
     SearchForSoldTool(),
+    SearchPropertiesAggregatedTool(),
     GetSuggestionsTool(),
     SearchAgentsTool(),
     GetAgentProfileTool(),
@@ -645,6 +802,7 @@ REALTOR_TOOLS = [
     GetPropertyDetailsTool(),
     GetPropertyPhotosTool(),
     GetPropertyEnvironmentRiskTool(),
+    GetPropertiesBatchTool(),
     GetSimilarHomesTool(),
     GetHousingMarketDetailsTool(),
     WalkScoreTool(),
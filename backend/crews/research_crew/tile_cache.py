@@ -0,0 +1,239 @@
+# Persistent XYZ tile cache for map basemaps, with LRU eviction, prefetch and an offline mode.
+#
+# Seed a region before going offline (run from the backend directory):
+#   python -m crews.research_crew.tile_cache --bbox -122.45 47.5 -122.2 47.75 --zoom 13 14 15
+#   python -m crews.research_crew.tile_cache --point 47.6062 -122.3321 --radius-km 5 --zoom 14 15
+import argparse
+import hashlib
+import io
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import httpx
+import mercantile
+import numpy as np
+from PIL import Image
+
+BASEMAP_URL = (
+    "https://basemap.nationalmap.gov/arcgis/rest/services/USGSTopo/MapServer/tile/{z}/{y}/{x}"
+)
+BASEMAP_ATTRIBUTION = "USGS National Map"
+BASEMAP_MAX_ZOOM = 16
+
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", "tile_cache")
+TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Render only from tiles already on disk, never hit the tile server
+TILE_CACHE_OFFLINE = os.getenv("TILE_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+TILE_FETCH_TIMEOUT = 20
+TILE_SIZE = 256
+
+
+class TileCache:
+    """
+    XYZ tiles stored as files under <root>/<source>/<z>/<x>/<y>.
+    A tile's mtime is bumped on every read, so eviction drops the least recently used tiles
+    once the cache grows past max_bytes.
+    """
+
+    def __init__(
+        self,
+        url: str = BASEMAP_URL,
+        root: str = TILE_CACHE_DIR,
+        max_bytes: int = TILE_CACHE_MAX_BYTES,
+        offline: bool = TILE_CACHE_OFFLINE,
+    ):
+        self.url = url
+        self.root = os.path.join(root, hashlib.sha1(url.encode()).hexdigest()[:12])
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._client = httpx.Client(timeout=TILE_FETCH_TIMEOUT, follow_redirects=True)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def path(self, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, str(z), str(x), str(y))
+
+    def _tile_files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def size(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._tile_files())
+            return self._size
+
+    def get(
+        self, z: int, x: int, y: int, timeout: Optional[float] = None, cached_only: bool = False
+    ) -> Optional[bytes]:
+        """
+        Returns the tile bytes from disk, fetching and caching it on a miss (unless offline or
+        cached_only). timeout overrides TILE_FETCH_TIMEOUT for the fetch.
+        """
+        path = self.path(z, x, y)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            pass
+        if self.offline or cached_only:
+            return None
+        response = self._client.get(
+            self.url.format(z=z, x=x, y=y), timeout=TILE_FETCH_TIMEOUT if timeout is None else timeout
+        )
+        response.raise_for_status()
+        self.put(z, x, y, response.content)
+        return response.content
+
+    def put(self, z: int, x: int, y: int, data: bytes):
+        path = self.path(z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        current = self.size()
+        with self._lock:
+            self._size = current + len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_ratio: float = 0.9):
+        """Deletes least recently used tiles until the cache is under target_ratio * max_bytes."""
+        with self._lock:
+            files = sorted(self._tile_files())
+            size = sum(size for _, size, _ in files)
+            target = self.max_bytes * target_ratio
+            for _, file_size, path in files:
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    size -= file_size
+                except FileNotFoundError:
+                    pass
+            self._size = size
+
+    def prefetch(
+        self, west: float, south: float, east: float, north: float, zooms: Iterable[int], workers: int = 8
+    ) -> int:
+        """Downloads every tile covering the lon/lat bbox at the given zooms. Returns the tile count."""
+        tiles = list(mercantile.tiles(west, south, east, north, list(zooms)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda t: self.get(t.z, t.x, t.y), tiles))
+        return len(tiles)
+
+
+def zoom_for_bounds(west: float, south: float, east: float, north: float) -> int:
+    """Same heuristic contextily uses to pick a zoom level for a lon/lat bbox."""
+    zoom_lon = math.ceil(math.log2(360 * 2.0 / max(east - west, 1e-9)))
+    zoom_lat = math.ceil(math.log2(360 * 2.0 / max(north - south, 1e-9)))
+    return int(min(zoom_lon, zoom_lat, BASEMAP_MAX_ZOOM))
+
+
+def add_cached_basemap(
+    ax,
+    xmin: float,
+    ymin: float,
+    xmax: float,
+    ymax: float,
+    cache: Optional[TileCache] = None,
+    zoom: Optional[int] = None,
+    deadline: Optional[float] = None,
+):
+    """
+    Draws the basemap for a web-mercator extent on ax from the tile cache (stand-in for ctx.add_basemap).
+    Tiles missing while offline are left blank. With a deadline (a time.time() value), tile fetches
+    are cut short to the time left, and once it has passed only tiles already on disk are used.
+    """
+    cache = cache or get_tile_cache()
+    west, south = mercantile.lnglat(xmin, ymin)
+    east, north = mercantile.lnglat(xmax, ymax)
+    zoom = zoom if zoom is not None else zoom_for_bounds(west, south, east, north)
+    tiles = list(mercantile.tiles(west, south, east, north, [zoom]))
+    xs = sorted({t.x for t in tiles})
+    ys = sorted({t.y for t in tiles})
+
+    image = np.full((len(ys) * TILE_SIZE, len(xs) * TILE_SIZE, 3), 255, dtype=np.uint8)
+    for tile in tiles:
+        remaining = None if deadline is None else deadline - time.time()
+        try:
+            data = cache.get(
+                tile.z, tile.x, tile.y, timeout=remaining, cached_only=remaining is not None and remaining <= 0
+            )
+        except httpx.TimeoutException:
+            if remaining is None:
+                raise
+            data = None
+        if data is None:
+            continue
+        tile_image = Image.open(io.BytesIO(data)).convert("RGB").resize((TILE_SIZE, TILE_SIZE))
+        row, col = ys.index(tile.y) * TILE_SIZE, xs.index(tile.x) * TILE_SIZE
+        image[row : row + TILE_SIZE, col : col + TILE_SIZE] = np.asarray(tile_image)
+
+    upper_left = mercantile.xy_bounds(xs[0], ys[0], zoom)
+    lower_right = mercantile.xy_bounds(xs[-1], ys[-1], zoom)
+    extent = (upper_left.left, lower_right.right, lower_right.bottom, upper_left.top)
+
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    ax.imshow(image, extent=extent, interpolation="bilinear", zorder=0)
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.text(
+        0.005, 0.005, BASEMAP_ATTRIBUTION, transform=ax.transAxes, fontsize=8, ha="left", va="bottom"
+    )
+
+
+_tile_cache: Optional[TileCache] = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> TileCache:
+    global _tile_cache
+    if _tile_cache is None:
+        with _tile_cache_lock:
+            if _tile_cache is None:
+                _tile_cache = TileCache()
+    return _tile_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch basemap tiles into the local tile cache")
+    area = parser.add_mutually_exclusive_group(required=True)
+    area.add_argument("--bbox", nargs=4, type=float, metavar=("WEST", "SOUTH", "EAST", "NORTH"))
+    area.add_argument("--point", nargs=2, type=float, metavar=("LAT", "LON"))
+    parser.add_argument("--radius-km", type=float, default=2.0, help="Half-width around --point")
+    parser.add_argument("--zoom", nargs="+", type=int, required=True, help="Zoom levels to seed")
+    args = parser.parse_args()
+
+    if args.bbox:
+        west, south, east, north = args.bbox
+    else:
+        lat, lon = args.point
+        dlat = args.radius_km / 111.32
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        west, south, east, north = lon - dlon, lat - dlat, lon + dlon, lat + dlat
+
+    cache = TileCache(offline=False)
+    count = cache.prefetch(west, south, east, north, args.zoom)
+    print(f"Cached {count} tiles in {cache.root} ({cache.size() / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# Trims tool results down to the fields the agents actually use before they go into the LLM context,
+# optionally rendering row lists (search results, batch lookups) as a compact pipe-separated table
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# Set to false to hand the agents raw tool output again (e.g. when debugging a tool)
+TOOL_OUTPUT_PROJECTION = os.getenv("TOOL_OUTPUT_PROJECTION", "true").lower() in ("1", "true", "yes")
+
+# Keys a row list is usually found under, checked before any other list in the result
+_ROW_KEYS = ("properties", "listings", "results", "profiles", "data", "home_search", "photos")
+_MISSING = object()
+
+
+def get_path(item: Any, path: str) -> Any:
+    """
+    Value at a dotted path ("location.address.city"). A numeric part indexes a list, "*" maps the
+    rest of the path over every item of a list ("photos.*.href"). "a|b" tries each path in turn
+    and returns the first one present. Missing paths give None.
+    """
+    for alternative in path.split("|"):
+        value = _get(item, alternative.split("."))
+        if value is not _MISSING and value is not None and value != []:
+            return value
+    return None
+
+
+def _get(value: Any, parts: List[str]) -> Any:
+    for i, part in enumerate(parts):
+        if part == "*" and isinstance(value, list):
+            values = [_get(v, parts[i + 1:]) for v in value]
+            return [v for v in values if v is not _MISSING and v is not None]
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+
+def project_item(item: Any, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {alias: value at path} for the declared fields, leaving out the ones that are missing.
+    A dict instead of a path projects the nested record item[alias] onto those fields and merges
+    them in (for results bundling several responses, e.g. a property's details and photos). If the
+    nested record is there but none of its fields match, it is kept whole under alias.
+    """
+    projected = {}
+    for alias, path in fields.items():
+        if isinstance(path, dict):
+            nested = item.get(alias) if isinstance(item, dict) else None
+            if nested is None:
+                continue
+            record = find_record(nested, path)
+            if record:
+                projected.update(record)
+            else:
+                projected[alias] = nested
+            continue
+        value = get_path(item, path)
+        if value is not None:
+            projected[alias] = value
+    return projected
+
+
+def columns_for(fields: Dict[str, Any]) -> List[str]:
+    """Table columns for a field set, with nested field sets flattened into their own columns."""
+    columns = []
+    for alias, path in fields.items():
+        if isinstance(path, dict):
+            columns.extend(column for column in columns_for(path) if column not in columns)
+            columns.append(alias)  # holds the raw record when none of its fields matched
+        elif alias not in columns:
+            columns.append(alias)
+    return columns
+
+
+def find_rows(result: Any, depth: int = 4) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    Splits a result into its main list of row dicts (looking up to depth levels down) and the other
+    top-level scalars / short lists worth keeping next to it (count, missing, ...).
+    """
+    if isinstance(result, list):
+        return [row for row in result if isinstance(row, dict)], {}
+    if not isinstance(result, dict):
+        return None, {}
+    extras = {
+        key: value
+        for key, value in result.items()
+        if isinstance(value, (str, int, float, bool)) or (
+            isinstance(value, list) and all(not isinstance(v, (dict, list)) for v in value)
+        )
+    }
+    keys = [key for key in _ROW_KEYS if key in result] + [key for key in result if key not in _ROW_KEYS]
+    for key in keys:
+        value = result[key]
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            return value, extras
+    if depth > 1:
+        for key in keys:
+            if isinstance(result[key], dict):
+                rows, _ = find_rows(result[key], depth - 1)
+                if rows:
+                    return rows, extras
+    return None, extras
+
+
+def find_record(result: Any, fields: Dict[str, Any], depth: int = 4) -> Dict[str, Any]:
+    """
+    Projection of a single-record result. Responses often wrap the record ({"status": true,
+    "data": {"home": ...}}), so the result and its nested dicts up to depth levels down are all
+    tried, and the one matching the most fields wins.
+    """
+    if not isinstance(result, dict):
+        return {}
+    best = project_item(result, fields)
+    if depth > 1:
+        for value in result.values():
+            projected = find_record(value, fields, depth - 1)
+            if len(projected) > len(best):
+                best = projected
+    return best
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ",".join(_cell(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def to_table(rows: List[Dict[str, Any]], columns: List[str], extras: Optional[Dict[str, Any]] = None) -> str:
+    """
+    key: value lines for the extras, then a header row and one pipe-separated line per row.
+    Columns that are empty in every row are left out.
+    """
+    lines = [f"{key}: {_cell(value)}" for key, value in (extras or {}).items()]
+    columns = [column for column in columns if any(row.get(column) is not None for row in rows)] or columns
+    lines.append("|".join(columns))
+    lines.extend("|".join(_cell(row.get(column)) for column in columns) for row in rows)
+    return "\n".join(lines)
+
+
+def project_output(result: Any, fields: Optional[Dict[str, Any]], table: bool = False) -> Any:
+    """
+    Applies a tool's declared output fields. With table set the result is treated as a list of
+    rows (search results, batch lookups): each row is projected and the list rendered as a table.
+    Otherwise it is a single record and projected on its own. Errors, results with no declared
+    fields, and results where none of the fields matched are passed through untouched, so an
+    unexpected upstream shape never hides data from the agent.
+    """
+    if not TOOL_OUTPUT_PROJECTION or not fields:
+        return result
+    if isinstance(result, dict) and "error" in result and len(result) == 1:
+        return result
+
+    if table:
+        rows, extras = find_rows(result)
+        if rows is None:
+            return result
+        projected = [project_item(row, fields) for row in rows]
+        if rows and not any(projected):
+            return result
+        return to_table(projected, columns_for(fields), extras)
+
+    projected = find_record(result, fields)
+    return projected if projected else result
@@ -1,40 +1,48 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, ClassVar, Dict, Optional
 from crewai.tools import BaseTool
+from .tool_output import project_output
+
+# One long-lived event loop for every async tool. Pooled HTTP clients are tied to the loop that
+# opened their connections, so running tools on a fresh loop per call would throw the pool away.
+_tool_loop: Optional[asyncio.AbstractEventLoop] = None
+_tool_loop_lock = threading.Lock()
+
+
+def get_tool_loop() -> asyncio.AbstractEventLoop:
+    """Starts the shared tool event loop in a daemon thread on first use."""
+    global _tool_loop
+    if _tool_loop is None:
+        with _tool_loop_lock:
+            if _tool_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="async-tool-loop", daemon=True
+                ).start()
+                _tool_loop = loop
+    return _tool_loop
 
 
 class AsyncBaseTool(BaseTool):
+    # Fields the agent gets back, as {name: dotted path into the result} (see tool_output.get_path).
+    # None passes the raw result through. output_table treats the result as a list of rows and renders
+    # it as compact pipe-separated text; otherwise the fields are picked from a single record.
+    output_fields: ClassVar[Optional[Dict[str, Any]]] = None
+    output_table: ClassVar[bool] = False
+
     def _run(self, *args, **kwargs):
+        loop = get_tool_loop()
         try:
-            # Try to get the current event loop
-            loop = asyncio.get_event_loop()
-
-            # Check if the loop is running
-            if loop.is_running():
-                # Use ThreadPoolExecutor if the loop is already running
-                with ThreadPoolExecutor() as executor:
-                    future = executor.submit(self._run_in_new_loop, *args, **kwargs)
-                    return future.result()
-            else:
-                # Use the existing loop if it's not running
-                return loop.run_until_complete(self.run_async_code(*args, **kwargs))
+            running = asyncio.get_running_loop()
         except RuntimeError:
-            # If there's no event loop in this thread, create a new one
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(self.run_async_code(*args, **kwargs))
-            finally:
-                loop.close()
-
-    def _run_in_new_loop(self, *args, **kwargs):
-        # Create a new event loop in the thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.run_async_code(*args, **kwargs))
-        finally:
-            loop.close()
+            running = None
+        if running is loop:
+            # Called from a coroutine already on the tool loop: waiting here would deadlock it
+            raise RuntimeError("AsyncBaseTool._run cannot be called from the tool event loop")
+        # Blocks the calling thread (crew worker or executor) until the coroutine finishes on the tool loop
+        future = asyncio.run_coroutine_threadsafe(self.run_async_code(*args, **kwargs), loop)
+        return project_output(future.result(), self.output_fields, self.output_table)
 
     async def run_async_code(self, *args, **kwargs):
         """This method should be implemented by subclasses to run async code."""
@@ -0,0 +1,122 @@
+# Searchable index over the NRI data dictionary (NRIDataDictionary.csv)
+import csv
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from .tract_store import DATA_DIR
+
+NRI_DICTIONARY_PATH = os.path.join(DATA_DIR, "NRIDataDictionary.csv")
+
+# Layers that describe the tract itself or composite indexes rather than a single hazard
+NON_HAZARD_LAYERS = {
+    "n/a",
+    "All",
+    "National Risk Index",
+    "Expected Annual Loss",
+    "Expected Annual Loss Rate",
+    "Social Vulnerability and Community Resilience Adjusted Expected Annual Loss Rate",
+    "Social Vulnerability",
+    "Community Resilience",
+    "Community Risk Factor",
+}
+
+
+class FieldIndex:
+    """
+    NRI fields grouped by hazard prefix (e.g. ERQK -> Earthquake) and metric type, with keyword search
+    over the field aliases. Built once from the data dictionary so tools can return one family of fields
+    instead of all ~480 rows.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.fields: List[Dict[str, str]] = []
+        self.hazards: Dict[str, str] = {}
+        self.by_hazard: Dict[str, List[int]] = defaultdict(list)
+        for row in rows:
+            field = {
+                "field_name": row["Field Name"],
+                "field_alias": row["Field Alias"],
+                "metric_type": row["Metric Type"],
+            }
+            i = len(self.fields)
+            self.fields.append(field)
+            layer = row["Relevant Layer"]
+            if layer not in NON_HAZARD_LAYERS:
+                prefix = field["field_name"].split("_", 1)[0]
+                self.hazards[prefix] = layer
+                self.by_hazard[prefix].append(i)
+        self._alias_text = [
+            f"{f['field_name']} {f['field_alias']} {f['metric_type']}".lower() for f in self.fields
+        ]
+
+    @classmethod
+    def from_csv(cls, path: str = NRI_DICTIONARY_PATH) -> "FieldIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def resolve_hazard(self, hazard: str) -> Optional[str]:
+        """Maps a hazard prefix ('ERQK') or name ('earthquake', 'Coastal Flooding') to its prefix."""
+        key = hazard.strip().lower()
+        for prefix, name in self.hazards.items():
+            if key == prefix.lower() or key == name.lower():
+                return prefix
+        for prefix, name in self.hazards.items():
+            if key in name.lower():
+                return prefix
+        return None
+
+    def hazard_families(self) -> List[Dict[str, object]]:
+        return [
+            {"prefix": prefix, "hazard": name, "field_count": len(self.by_hazard[prefix])}
+            for prefix, name in self.hazards.items()
+        ]
+
+    def search(
+        self,
+        hazard: Optional[str] = None,
+        metric_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Returns the fields matching every filter given:
+            hazard: prefix or hazard name, e.g. "ERQK" or "earthquake"
+            metric_type: metric type or field suffix, e.g. "Expected Annual Loss" or "EAL"
+            keyword: words that must all appear in the field name/alias/metric type
+        """
+        if hazard:
+            prefix = self.resolve_hazard(hazard)
+            if prefix is None:
+                return []
+            candidates = self.by_hazard[prefix]
+        else:
+            candidates = range(len(self.fields))
+
+        results = []
+        metric = metric_type.strip().lower() if metric_type else None
+        words = keyword.lower().split() if keyword else []
+        for i in candidates:
+            field = self.fields[i]
+            if metric:
+                suffix = field["field_name"].split("_", 1)[-1].lower()
+                if metric not in field["metric_type"].lower() and not suffix.startswith(metric):
+                    continue
+            if words and not all(word in self._alias_text[i] for word in words):
+                continue
+            results.append(field)
+        return results
+
+
+_index: Optional[FieldIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_field_index() -> FieldIndex:
+    """Builds the data dictionary index on first use and returns the shared instance."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FieldIndex.from_csv()
+    return _index
@@ -1,53 +1,206 @@
 # A simple set of async functions to get the geo data for a given address, refactored for CrewAI tool usage
-from typing import Dict, Any, List
-import pandas as pd
+import asyncio
+import csv
+import hashlib
+import io
+from typing import Dict, Any, List, Optional, Tuple
 
 import httpx
-from .utils import parse_us_address
+from http_client import get_http_client
+from singleflight import SingleFlight
+from .utils import split_us_address
+from .tract_store import get_tract_store, normalize_tract_fips
+from .field_index import get_field_index
+from .tract_boundaries import tract_for_point, tracts_for_points
+from .geocode_cache import get_geocode_cache
+from .tract_neighbors import get_tract_neighbors
+from .risk_profile import PROFILE_HAZARDS
 
-GEO_API_URL = "https://geocoding.geo.census.gov/geocoder/geographies/address"
-LONG_LAT_API_URL = "https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
+GEOCODE_API_URL = "https://geocoding.geo.census.gov/geocoder/geographies/onelineaddress"
+BATCH_GEOCODE_API_URL = "https://geocoding.geo.census.gov/geocoder/geographies/addressbatch"
 
-# TODO: Have the CSV get loaded on app run into memory to be referenced in the main.py
-# Load CSV data for service use - temporary
-tract_data = pd.read_csv("geodeeper_service/NRI_Table_CensusTracts_Washington.csv")
-tract_data_columns = pd.read_csv("geodeeper_service/NRIDataDictionary.csv")
+# The Census batch geocoder takes at most 10,000 records per upload. Smaller chunks come back
+# sooner and run side by side, so the default is well under the limit.
+CENSUS_BATCH_LIMIT = 10_000
+BATCH_GEOCODE_CHUNK_SIZE = 500
+BATCH_GEOCODE_CONCURRENCY = 4
+BATCH_GEOCODE_TIMEOUT = 300
 
-# Consolidated function to get tract FIPS from address
-async def get_tract_fips_from_address(address: str) -> dict:
-    """
-    Async tool to get the Census Tract FIPS (GEOID) for a given address.
-    Args:
-        address (str): The address to geocode.
-    Returns:
-        dict: {"tract_fips": str} or {"error": str}
-    """
-    street, city, state = parse_us_address(address)
+# The NRI tract table lives in tract_store and the data dictionary in field_index, both loaded once on first use
+
+# Census requests currently in flight, so concurrent callers for the same address / upload share one
+_single_flight = SingleFlight()
+
+
+async def _fetch_geocode(address: str) -> Dict[str, Any]:
+    """Single Census geographies lookup returning coordinates, tract and block group. Caches the outcome."""
     params = {
-        "street": street,
-        "city": city,
-        "state": state,
+        "address": address,
         "benchmark": "Public_AR_Current",
         "vintage": "Current_Current",
         "layers": "10",
         "format": "json"
     }
+    cache = get_geocode_cache()
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(GEO_API_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-        # print('data', data)
+        response = await get_http_client().get(GEOCODE_API_URL, params=params)
+        response.raise_for_status()
+        data = response.json()
         match = data["result"]["addressMatches"][0]
-        geoid = match["geographies"]["Census Block Groups"][0]["GEOID"]
-        tract_fips = geoid[:11]  # First 11 digits are the full tract FIPS
-        return {"tract_fips": tract_fips}
+        coords = match["coordinates"]
+        block_group = match["geographies"]["Census Block Groups"][0]["GEOID"]
+        result = {
+            "longitude": coords["x"],
+            "latitude": coords["y"],
+            "tract_fips": block_group[:11],  # First 11 digits are the full tract FIPS
+            "block_group": block_group,
+        }
+        cache.set("geocode", address, result)
+        return result
     except (IndexError, KeyError):
-        return {"error": "Could not extract tract FIPS from address, merp merp"}
+        result = {"error": f"Could not resolve address: {address}"}
+        cache.set("geocode", address, result, negative=True)
+        return result
     except Exception as e:
         return {"error": str(e)}
 
 
+# Geocode an address to coordinates + tract + block group in one round trip
+async def geocode_address(address: str) -> Dict[str, Any]:
+    """
+    Async tool to geocode an address with the US Census geographies endpoint.
+    Results come from the persistent geocode cache when possible, and concurrent calls for the
+    same address share a single in-flight request.
+    Args:
+        address (str): The address to geocode.
+    Returns:
+        dict: {"longitude": float, "latitude": float, "tract_fips": str, "block_group": str} or {"error": str}
+    """
+    cache = get_geocode_cache()
+    cached = cache.get("geocode", address)
+    if cached is not None:
+        return cached
+
+    return await _single_flight.do(cache.key("geocode", address), lambda: _fetch_geocode(address))
+
+
+def _parse_batch_response(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parses the addressbatch CSV response into {record id: result} for the matched records. Matched rows look like
+    id, input address, Match, Exact, matched address, "lon,lat", tiger line id, side, state, county, tract, block
+    """
+    results = {}
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) < 12 or row[2] != "Match":
+            continue
+        record_id = row[0]
+        lon, lat = (float(v) for v in row[5].split(","))
+        tract_fips = f"{row[8]}{row[9]}{row[10]}"
+        results[record_id] = {
+            "longitude": lon,
+            "latitude": lat,
+            "tract_fips": tract_fips,
+            "block_group": tract_fips + row[11][:1],
+        }
+    return results
+
+
+async def _geocode_batch_chunk(
+    client: httpx.AsyncClient, records: List[Tuple[str, str]], semaphore: asyncio.Semaphore
+) -> Dict[str, Dict[str, Any]]:
+    """Uploads one chunk of (id, address) records to the batch geocoder."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record_id, address in records:
+        writer.writerow([record_id, *split_us_address(address)])
+    data = {"benchmark": "Public_AR_Current", "vintage": "Current_Current"}
+    body = buffer.getvalue()
+    files = {"addressFile": ("addresses.csv", body, "text/csv")}
+
+    async def upload() -> str:
+        async with semaphore:
+            response = await client.post(
+                BATCH_GEOCODE_API_URL, data=data, files=files, timeout=BATCH_GEOCODE_TIMEOUT
+            )
+            response.raise_for_status()
+            return response.text
+
+    try:
+        # Two batch calls racing on the same addresses upload the chunk once
+        key = ("addressbatch", hashlib.sha1(body.encode()).hexdigest())
+        return _parse_batch_response(await _single_flight.do(key, upload))
+    except Exception as e:
+        return {record_id: {"error": str(e)} for record_id, _ in records}
+
+
+async def geocode_addresses_batch(
+    addresses: List[str], chunk_size: int = BATCH_GEOCODE_CHUNK_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Async tool to geocode many addresses at once with the Census addressbatch endpoint.
+    Cached addresses are served from the geocode cache, duplicates are sent once, and the rest are
+    uploaded in chunks (at most CENSUS_BATCH_LIMIT records each) that run concurrently.
+    Args:
+        addresses (list[str]): The addresses to geocode.
+        chunk_size (int): Records per batch upload.
+    Returns:
+        list[dict]: One result per input address, in order, shaped like geocode_address()
+    """
+    cache = get_geocode_cache()
+    chunk_size = max(1, min(chunk_size, CENSUS_BATCH_LIMIT))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, str] = {}  # cache key -> address
+    for address in addresses:
+        key = cache.key("geocode", address)
+        if key in results or key in pending:
+            continue
+        cached = cache.get("geocode", address)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending[key] = address
+
+    if pending:
+        records = [(str(i), address) for i, address in enumerate(pending.values())]
+        keys = list(pending)
+        semaphore = asyncio.Semaphore(BATCH_GEOCODE_CONCURRENCY)
+        client = get_http_client()
+        chunks = await asyncio.gather(
+            *(
+                _geocode_batch_chunk(client, records[i : i + chunk_size], semaphore)
+                for i in range(0, len(records), chunk_size)
+            )
+        )
+        fetched = {record_id: result for chunk in chunks for record_id, result in chunk.items()}
+        for record_id, address in records:
+            key = keys[int(record_id)]
+            result = fetched.get(record_id)
+            if result is None:
+                result = {"error": f"Could not resolve address: {address}"}
+                cache.set("geocode", address, result, negative=True)
+            elif "error" not in result:
+                cache.set("geocode", address, result)
+            results[key] = result
+
+    return [results[cache.key("geocode", address)] for address in addresses]
+
+
+# Consolidated function to get tract FIPS from address
+async def get_tract_fips_from_address(address: str) -> dict:
+    """
+    Async tool to get the Census Tract FIPS (GEOID) for a given address.
+    Args:
+        address (str): The address to geocode.
+    Returns:
+        dict: {"tract_fips": str} or {"error": str}
+    """
+    result = await geocode_address(address)
+    if "error" in result:
+        return result
+    return {"tract_fips": result["tract_fips"]}
+
+
 # Get a long/lat for a given address using Census Geocoder
 async def get_long_lat_from_address(address: str) -> Dict[str, Any]:
     """
@@ -57,44 +210,85 @@ async def get_long_lat_from_address(address: str) -> Dict[str, Any]:
     Returns:
         dict: {"longitude": float, "latitude": float, "tract_fips": str} or {"error": str}
     """
-    
-    params = {
-        "address": address,
-        "benchmark": "2020",
-        "format": "json"
+    result = await geocode_address(address)
+    if "error" in result:
+        return result
+    return {
+        "longitude": result["longitude"],
+        "latitude": result["latitude"],
+        "tract_fips": result["tract_fips"],
     }
+
+
+# Resolve tract FIPS locally from coordinates (no geocoder round trip)
+async def get_tract_fips_from_coordinates(latitude: float, longitude: float) -> dict:
+    """
+    Async tool to get the Census Tract FIPS for a latitude/longitude using the local tract boundaries.
+    Args:
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+    Returns:
+        dict: {"tract_fips": str} or {"error": str}
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(LONG_LAT_API_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-        match = data["result"]["addressMatches"][0]
-        coords = match["coordinates"]
-        lat, lng = coords["y"], coords["x"]
-        tract_fips = None
-        if "geographies" in match and "Census Tracts" in match["geographies"]:
-            tract_fips = match["geographies"]["Census Tracts"][0].get("GEOID")
-        result = {"longitude": lng, "latitude": lat}
-        if tract_fips:
-            result["tract_fips"] = tract_fips
-        return result
-    except (IndexError, KeyError):
-        return {"error": f"Could not resolve address: {address}"}
+        tract_fips = tract_for_point(latitude, longitude)
+        if tract_fips is None:
+            return {"error": f"No census tract found at {latitude}, {longitude}"}
+        return {"tract_fips": tract_fips}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def get_tract_fips_from_coordinates_batch(
+    latitudes: list[float], longitudes: list[float]
+) -> dict:
+    """
+    Async tool to get the Census Tract FIPS for many points at once using the local tract boundaries.
+    Args:
+        latitudes (list[float]): Latitudes of the points.
+        longitudes (list[float]): Longitudes of the points, same length as latitudes.
+    Returns:
+        dict: {"tract_fips": [str | None, ...]} in input order, or {"error": str}
+    """
+    if len(latitudes) != len(longitudes):
+        return {"error": "latitudes and longitudes must be the same length"}
+    try:
+        return {"tract_fips": tracts_for_points(latitudes, longitudes)}
     except Exception as e:
         return {"error": str(e)}
 
+
 # Function to get the field names and aliases from the NRI data dictionary
-async def get_tract_field_names() -> list[dict]:
+async def get_tract_field_names(
+    hazard: Optional[str] = None,
+    metric_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> list[dict]:
     """
     Async tool to get the field names and aliases from the NRI data dictionary.
+    With no filters every field is returned; the filters narrow it down to one family.
+    Args:
+        hazard (str, optional): Hazard prefix or name, e.g. "ERQK" or "earthquake".
+        metric_type (str, optional): Metric type or field suffix, e.g. "Expected Annual Loss" or "EAL".
+        keyword (str, optional): Words that must all appear in the field name/alias.
     Returns:
-        list[dict]: List of {"field_name": ..., "field_alias": ...}
+        list[dict]: List of {"field_name": ..., "field_alias": ..., "metric_type": ...}
     """
     try:
-        return [
-            {"field_name": row["Field Name"], "field_alias": row["Field Alias"]}
-            for _, row in tract_data_columns.iterrows()
-        ]
+        return get_field_index().search(hazard, metric_type, keyword)
+    except Exception as e:
+        return []
+
+
+# Function to list the hazard families (field prefixes) in the NRI data dictionary
+async def get_hazard_families() -> list[dict]:
+    """
+    Async tool to list the hazard field prefixes in the NRI data dictionary.
+    Returns:
+        list[dict]: List of {"prefix": "ERQK", "hazard": "Earthquake", "field_count": int}
+    """
+    try:
+        return get_field_index().hazard_families()
     except Exception as e:
         return []
 
@@ -110,21 +304,113 @@ async def get_geo_data(field_names: list[str], tract_fips: str) -> dict:
         dict: Dictionary of field names and their corresponding data.
     """
     try:
-        # Ensure both are strings and match format
-        tract_fips = str(tract_fips)
-        tract_data['TRACTFIPS'] = tract_data['TRACTFIPS'].astype(str)
-        filtered_data = tract_data[tract_data['TRACTFIPS'] == tract_fips]
-        
-        if filtered_data.empty:
+        results = get_tract_store().lookup(tract_fips, field_names)
+        if results is None:
             return {"error": f"Tract FIPS {tract_fips} not found in NRI data"}
-        
-        results = {}
-        for field_name in field_names:
-            if field_name in filtered_data.columns:
-                results[field_name] = filtered_data[field_name].values[0]
-            else:
-                results[field_name] = None
         return results
     except Exception as e:
         return {"error": str(e)}
 
+
+# Batch version of get_geo_data: many tracts x many fields in one vectorized join
+async def get_geo_data_batch(field_names: list[str], tract_fips_list: list[str]) -> dict:
+    """
+    Async tool to get the data for many field names across many tract FIPS at once.
+    Args:
+        field_names (list[str]): List of field names to get data for.
+        tract_fips_list (list[str]): The tract FIPS codes to get data for.
+    Returns:
+        dict: {"fields": [...], "rows": [[tract_fips, value, ...], ...], "missing": [tract_fips, ...]} or {"error": str}
+    """
+    try:
+        return get_tract_store().lookup_table(tract_fips_list, field_names)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# Precomputed hazard levels/percentiles for a tract
+async def get_risk_profile(tract_fips: str) -> dict:
+    """
+    Async tool to get the precomputed risk profile of a tract: for each quick-check hazard its score,
+    NRI rating, national and state percentile, low/medium/high level, plus the hazards that need a deep dive.
+    Args:
+        tract_fips (str): The tract FIPS code to get the profile for.
+    Returns:
+        dict: {"tract_fips": str, "hazards": {name: {...}}, "deep_dive": [name, ...]} or {"error": str}
+    """
+    try:
+        profile = get_tract_store().risk_profile(tract_fips)
+        if profile is None:
+            return {"error": f"Tract FIPS {tract_fips} not found in NRI data"}
+        return profile
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def get_risk_profiles(tract_fips_list: list[str]) -> dict:
+    """
+    Async tool to get the precomputed risk profiles of many tracts at once.
+    Args:
+        tract_fips_list (list[str]): The tract FIPS codes to get profiles for.
+    Returns:
+        dict: {"profiles": [profile, ...], "missing": [tract_fips, ...]} or {"error": str}
+    """
+    try:
+        store = get_tract_store()
+        profiles, missing = [], []
+        for tract_fips in dict.fromkeys(tract_fips_list):
+            profile = store.risk_profile(tract_fips)
+            if profile is None:
+                missing.append(tract_fips)
+            else:
+                profiles.append(profile)
+        return {"profiles": profiles, "missing": missing}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# Compare a tract's hazard scores with its nearest neighbouring tracts
+async def get_nearby_tract_comparison(
+    tract_fips: str, k: int = 5, field_names: Optional[list[str]] = None
+) -> dict:
+    """
+    Async tool to compare a tract with its k nearest tracts (by centroid) in one call.
+    Args:
+        tract_fips (str): The tract FIPS code to compare.
+        k (int): How many neighbouring tracts to return.
+        field_names (list[str], optional): Fields to compare, defaults to the quick-check hazard risk scores.
+    Returns:
+        dict: {"tract_fips", "fields", "tract": [values], "neighbors": {"fields", "rows"}, "neighbor_mean": {field: mean}}
+        or {"error": str}
+    """
+    try:
+        field_names = field_names or [f"{code}_RISKS" for code in PROFILE_HAZARDS.values()]
+        neighbors = get_tract_neighbors().nearest(tract_fips, k)
+        if neighbors is None:
+            return {"error": f"Tract FIPS {tract_fips} not found in tract boundaries"}
+
+        fips_list = [normalize_tract_fips(tract_fips)] + [n["tract_fips"] for n in neighbors]
+        table = get_tract_store().lookup_table(fips_list, field_names)
+        rows = {row[0]: row[1:] for row in table["rows"]}
+        own = rows.get(fips_list[0])
+        if own is None:
+            return {"error": f"Tract FIPS {tract_fips} not found in NRI data"}
+
+        neighbor_rows = [
+            [n["tract_fips"], n["distance_km"], *rows[n["tract_fips"]]]
+            for n in neighbors
+            if n["tract_fips"] in rows
+        ]
+        neighbor_mean = {}
+        for i, field_name in enumerate(field_names):
+            values = [r[i + 2] for r in neighbor_rows if isinstance(r[i + 2], (int, float))]
+            neighbor_mean[field_name] = round(sum(values) / len(values), 2) if values else None
+        return {
+            "tract_fips": fips_list[0],
+            "fields": field_names,
+            "tract": own,
+            "neighbors": {"fields": ["TRACTFIPS", "distance_km", *field_names], "rows": neighbor_rows},
+            "neighbor_mean": neighbor_mean,
+        }
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,128 @@
+# Persistent, disk-backed geocode cache shared by every worker on the host (SQLite in WAL mode)
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .tract_store import DATA_DIR
+from .utils import normalize_address
+
+GEOCODE_CACHE_PATH = os.getenv(
+    "GEOCODE_CACHE_PATH", os.path.join(DATA_DIR, "geocode_cache.sqlite3")
+)
+# Addresses don't move, but tract vintages and geocoder fixes do
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+# Non-matches are cached for less time so typo'd / new addresses get retried
+GEOCODE_CACHE_NEGATIVE_TTL = int(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL", 24 * 3600))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 100_000))
+
+# Only check the table size every N writes to keep set() cheap
+_EVICT_EVERY = 100
+
+
+class GeocodeCache:
+    """
+    Geocode results keyed on "<kind>:<normalized address>".
+    Entries expire after ttl (negative_ttl for non-matches) and the least recently used entries
+    are evicted once the table grows past max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str = GEOCODE_CACHE_PATH,
+        ttl: int = GEOCODE_CACHE_TTL,
+        negative_ttl: int = GEOCODE_CACHE_NEGATIVE_TTL,
+        max_entries: int = GEOCODE_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocode (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    negative INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS geocode_accessed ON geocode (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; crew tools run on their own threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(kind: str, address: str) -> str:
+        return f"{kind}:{normalize_address(address)}"
+
+    def get(self, kind: str, address: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached result (including cached non-match errors) or None on a miss."""
+        key = self.key(kind, address)
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at FROM geocode WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < now:
+            conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE geocode SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, kind: str, address: str, value: Dict[str, Any], negative: bool = False):
+        now = time.time()
+        ttl = self.negative_ttl if negative else self.ttl
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO geocode (key, value, negative, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (self.key(kind, address), json.dumps(value), int(negative), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones beyond max_entries."""
+        conn = self._connect()
+        conn.execute("DELETE FROM geocode WHERE expires_at < ?", (time.time(),))
+        (count,) = conn.execute("SELECT COUNT(*) FROM geocode").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM geocode")
+
+
+_cache: Optional[GeocodeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache()
+    return _cache
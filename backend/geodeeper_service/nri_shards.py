@@ -0,0 +1,142 @@
+# On-disk, per-state sharded NRI tract tables.
+#
+# Each state FIPS prefix gets its own directory of .npy column files (rows sorted by tract FIPS),
+# plus a manifest.json at the root. Shards are opened with mmap so a worker only pages in the
+# columns and states it actually reads.
+#
+# Build once from the FEMA NRI CSVs (run from the backend directory):
+#   python -m geodeeper_service.nri_shards path/to/NRI_Table_CensusTracts_*.csv
+import argparse
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .tract_store import DATA_DIR, TractStore, lookup_table, normalize_tract_fips
+
+NRI_SHARD_DIR = os.getenv("NRI_SHARD_DIR", os.path.join(DATA_DIR, "nri_shards"))
+MANIFEST_NAME = "manifest.json"
+SHARD_FORMAT_VERSION = 1
+
+
+def _column_array(series: pd.Series) -> np.ndarray:
+    """Converts a column to a fixed-width dtype that can be memory mapped (no object arrays)."""
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy()
+    return np.array(series.fillna("").astype(str).tolist(), dtype=str)
+
+
+def write_shard(df: pd.DataFrame, shard_dir: str) -> List[str]:
+    """Writes one state's rows as sorted, per-column .npy files. Returns the column names written."""
+    os.makedirs(shard_dir, exist_ok=True)
+    df = df.sort_values("TRACTFIPS", kind="stable")
+    for name in df.columns:
+        np.save(os.path.join(shard_dir, f"{name}.npy"), _column_array(df[name]))
+    return list(df.columns)
+
+
+def build_shards(csv_paths: List[str], out_dir: str = NRI_SHARD_DIR) -> Dict[str, Any]:
+    """
+    Splits the FEMA NRI tract CSVs into one shard per state FIPS prefix and writes the manifest.
+    Re-running with more CSVs adds/replaces states and keeps the ones already built.
+    """
+    manifest = load_manifest(out_dir) or {"version": SHARD_FORMAT_VERSION, "states": {}}
+    for csv_path in csv_paths:
+        df = pd.read_csv(csv_path, dtype={"TRACTFIPS": str}, low_memory=False)
+        df["TRACTFIPS"] = df["TRACTFIPS"].map(normalize_tract_fips)
+        for state_fips, state_df in df.groupby(df["TRACTFIPS"].str[:2]):
+            columns = write_shard(state_df, os.path.join(out_dir, state_fips))
+            manifest["states"][state_fips] = {
+                "rows": len(state_df),
+                "columns": columns,
+                "source": os.path.basename(csv_path),
+            }
+            print(f"Wrote shard {state_fips}: {len(state_df)} tracts from {csv_path}")
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(shard_dir: str = NRI_SHARD_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class ShardedTractStore:
+    """
+    Lazily opens a memory-mapped TractStore per state the first time a tract in that state is requested.
+    Exposes the same lookup interface as TractStore.
+    """
+
+    def __init__(self, shard_dir: str = NRI_SHARD_DIR, manifest: Optional[Dict[str, Any]] = None):
+        self.shard_dir = shard_dir
+        self.manifest = manifest or load_manifest(shard_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No NRI shard manifest found in {shard_dir}")
+        self._shards: Dict[str, TractStore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def states(self) -> List[str]:
+        return sorted(self.manifest["states"])
+
+    def loaded_states(self) -> List[str]:
+        return sorted(self._shards)
+
+    def shard(self, state_fips: str) -> Optional[TractStore]:
+        """Returns the store for a state FIPS prefix, opening it on first access. None if not built."""
+        store = self._shards.get(state_fips)
+        if store is not None:
+            return store
+        entry = self.manifest["states"].get(state_fips)
+        if entry is None:
+            return None
+        with self._lock:
+            if state_fips not in self._shards:
+                shard_dir = os.path.join(self.shard_dir, state_fips)
+                columns = {
+                    name: np.load(os.path.join(shard_dir, f"{name}.npy"), mmap_mode="r")
+                    for name in entry["columns"]
+                }
+                self._shards[state_fips] = TractStore(columns)
+            return self._shards[state_fips]
+
+    def shard_for(self, tract_fips: str) -> Optional[TractStore]:
+        return self.shard(normalize_tract_fips(tract_fips)[:2])
+
+    def __contains__(self, tract_fips: str) -> bool:
+        store = self.shard_for(tract_fips)
+        return store is not None and tract_fips in store
+
+    def lookup(self, tract_fips: str, field_names: List[str]) -> Optional[Dict[str, Any]]:
+        store = self.shard_for(tract_fips)
+        if store is None:
+            return None
+        return store.lookup(tract_fips, field_names)
+
+    def risk_profile(self, tract_fips: str) -> Optional[Dict[str, Any]]:
+        store = self.shard_for(tract_fips)
+        return None if store is None else store.risk_profile(tract_fips)
+
+    def lookup_table(self, tract_fips_list: List[str], field_names: List[str]) -> Dict[str, Any]:
+        return lookup_table(self.shard, tract_fips_list, field_names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-state NRI tract shards from FEMA CSVs")
+    parser.add_argument("csv_paths", nargs="+", help="NRI_Table_CensusTracts_*.csv files")
+    parser.add_argument("--out", default=NRI_SHARD_DIR, help="Shard output directory")
+    args = parser.parse_args()
+    manifest = build_shards(args.csv_paths, args.out)
+    print(f"{len(manifest['states'])} states in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
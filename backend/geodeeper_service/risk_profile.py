@@ -0,0 +1,107 @@
+# Per-tract hazard risk profiles, precomputed with vectorized NumPy when a tract table is loaded
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .tract_store import to_python
+
+# Hazards in the quick check, keyed by the name the profile reports them under, with their NRI code.
+# Most match the crew's EnvironmentalRisks fields; the two flood hazards are also combined below.
+PROFILE_HAZARDS = {
+    "earthquake": "ERQK",
+    "landslide": "LNDS",
+    "riverine_flood": "RFLD",
+    "coastal_flood": "CFLD",
+    "wildfire": "WFIR",
+    "hurricane": "HRCN",
+}
+
+# EnvironmentalRisks fields that cover more than one NRI hazard: the profile reports the
+# highest-scoring of them under this name, with "source" saying which one it was
+COMBINED_HAZARDS = {
+    "flood": ("riverine_flood", "coastal_flood"),
+}
+
+# NRI hazard risk scores (<HAZ>_RISKS) are 0-100 national percentile ranks.
+# Levels map onto RiskDetail.level: < MEDIUM is low, < HIGH is medium, otherwise high.
+MEDIUM_THRESHOLD = 40.0
+HIGH_THRESHOLD = 70.0
+# Hazards at or above this score get flagged for a deep dive
+DEEP_DIVE_THRESHOLD = 90.0
+LEVELS = np.array(["low", "medium", "high"])
+
+
+def state_percentiles(scores: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """Percent of tracts in the same state scoring at or below each tract. NaN scores stay NaN."""
+    result = np.full(len(scores), np.nan)
+    for state in np.unique(states):
+        in_state = states == state
+        state_scores = scores[in_state]
+        ranked = np.sort(state_scores[~np.isnan(state_scores)])
+        if len(ranked) == 0:
+            continue
+        pct = np.searchsorted(ranked, state_scores, side="right") / len(ranked) * 100
+        result[in_state] = np.where(np.isnan(state_scores), np.nan, pct)
+    return result
+
+
+class RiskProfileTable:
+    """
+    Risk profile columns for every tract in a TractStore: score, national and state percentile,
+    low/medium/high level and deep dive flag per hazard. Computed once, then each lookup is a row index.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        states = np.asarray(store.fips).astype("U2")
+        self.scores: Dict[str, np.ndarray] = {}
+        self.state_percentiles: Dict[str, np.ndarray] = {}
+        self.levels: Dict[str, np.ndarray] = {}
+        self.deep_dive: Dict[str, np.ndarray] = {}
+        for hazard, code in PROFILE_HAZARDS.items():
+            column = store.columns.get(f"{code}_RISKS")
+            if column is None:
+                scores = np.full(len(store), np.nan)
+            else:
+                scores = np.asarray(column, dtype=float)
+            self.scores[hazard] = scores
+            self.state_percentiles[hazard] = state_percentiles(scores, states)
+            self.levels[hazard] = np.digitize(
+                np.nan_to_num(scores, nan=0.0), [MEDIUM_THRESHOLD, HIGH_THRESHOLD]
+            )
+            self.deep_dive[hazard] = scores >= DEEP_DIVE_THRESHOLD
+
+    def profile(self, row: int) -> Dict[str, Any]:
+        hazards = {}
+        deep_dive = []
+        for hazard, code in PROFILE_HAZARDS.items():
+            score = self.scores[hazard][row]
+            if np.isnan(score):
+                # Hazard not assessed for this tract
+                continue
+            rating_column = self.store.columns.get(f"{code}_RISKR")
+            rating = None if rating_column is None else to_python(rating_column[row])
+            hazards[hazard] = {
+                "code": f"{code}_RISKS",
+                "score": round(float(score), 2),
+                "rating": rating if isinstance(rating, str) else None,
+                "national_percentile": round(float(score), 2),
+                "state_percentile": round(float(self.state_percentiles[hazard][row]), 2),
+                "level": str(LEVELS[self.levels[hazard][row]]),
+            }
+            if self.deep_dive[hazard][row]:
+                deep_dive.append(hazard)
+        for combined, parts in COMBINED_HAZARDS.items():
+            assessed = [part for part in parts if part in hazards]
+            if assessed:
+                source = max(assessed, key=lambda part: hazards[part]["score"])
+                hazards[combined] = {**hazards[source], "source": source}
+        return {
+            "tract_fips": str(self.store.fips[row]),
+            "hazards": hazards,
+            "deep_dive": deep_dive,
+        }
+
+    def lookup(self, tract_fips: str) -> Optional[Dict[str, Any]]:
+        row = self.store.row_for(tract_fips)
+        return None if row is None else self.profile(row)
@@ -0,0 +1,96 @@
+# Offline coordinate -> census tract resolution using TIGER/Line tract polygons and a shapely STRtree.
+#
+# Drop the Census TIGER/Line tract files for the states you need into TIGER_TRACT_DIR, e.g.
+#   https://www2.census.gov/geo/tiger/TIGER2020/TRACT/tl_2020_53_tract.zip  (53 = Washington)
+# Zipped shapefiles can be used as-is.
+import glob
+import os
+import threading
+from typing import List, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+from .tract_store import DATA_DIR
+
+TIGER_TRACT_DIR = os.getenv("TIGER_TRACT_DIR", os.path.join(DATA_DIR, "tiger_tracts"))
+
+
+def _geoid_column(gdf: gpd.GeoDataFrame) -> str:
+    # TIGER uses GEOID, older vintages GEOID10 / GEOID20
+    for name in ("GEOID", "GEOID20", "GEOID10"):
+        if name in gdf.columns:
+            return name
+    raise KeyError("Tract layer has no GEOID column")
+
+
+class TractBoundaries:
+    """Tract polygons (EPSG:4326) behind an STRtree for point-in-polygon lookups."""
+
+    def __init__(self, geoids: np.ndarray, geometries: np.ndarray):
+        self.geoids = geoids
+        self.geometries = geometries
+        self.tree = STRtree(geometries)
+
+    @classmethod
+    def from_files(cls, paths: Sequence[str]) -> "TractBoundaries":
+        frames = []
+        for path in paths:
+            gdf = gpd.read_file(path).to_crs(4326)
+            frames.append(
+                gpd.GeoDataFrame({"GEOID": gdf[_geoid_column(gdf)].astype(str)}, geometry=gdf.geometry)
+            )
+        tracts = pd.concat(frames, ignore_index=True)
+        return cls(tracts["GEOID"].to_numpy(dtype=str), tracts.geometry.to_numpy())
+
+    @classmethod
+    def from_dir(cls, directory: str = TIGER_TRACT_DIR) -> "TractBoundaries":
+        paths = sorted(
+            glob.glob(os.path.join(directory, "*.shp")) + glob.glob(os.path.join(directory, "*.zip"))
+        )
+        if not paths:
+            raise FileNotFoundError(f"No TIGER tract files found in {directory}")
+        return cls.from_files(paths)
+
+    def __len__(self) -> int:
+        return len(self.geoids)
+
+    def tract_for_point(self, lat: float, lon: float) -> Optional[str]:
+        """Returns the tract FIPS containing the point, or None if it falls outside the loaded tracts."""
+        hits = self.tree.query(shapely.points(lon, lat), predicate="intersects")
+        return str(self.geoids[hits[0]]) if len(hits) else None
+
+    def tracts_for_points(self, lats: Sequence[float], lons: Sequence[float]) -> List[Optional[str]]:
+        """Vectorized tract_for_point. Returns one tract FIPS (or None) per input point, in order."""
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        point_idx, tract_idx = self.tree.query(points, predicate="intersects")
+        result = np.full(len(points), None, dtype=object)
+        # A point on a shared edge matches several tracts; keep the first like tract_for_point
+        first = np.unique(point_idx, return_index=True)[1]
+        result[point_idx[first]] = self.geoids[tract_idx[first]]
+        return result.tolist()
+
+
+_boundaries: Optional[TractBoundaries] = None
+_boundaries_lock = threading.Lock()
+
+
+def get_tract_boundaries() -> TractBoundaries:
+    """Loads the tract polygons on first use and returns the shared index."""
+    global _boundaries
+    if _boundaries is None:
+        with _boundaries_lock:
+            if _boundaries is None:
+                _boundaries = TractBoundaries.from_dir()
+    return _boundaries
+
+
+def tract_for_point(lat: float, lon: float) -> Optional[str]:
+    return get_tract_boundaries().tract_for_point(lat, lon)
+
+
+def tracts_for_points(lats: Sequence[float], lons: Sequence[float]) -> List[Optional[str]]:
+    return get_tract_boundaries().tracts_for_points(lats, lons)
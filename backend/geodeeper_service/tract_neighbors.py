@@ -0,0 +1,70 @@
+# k-nearest-neighbour tract lookups over tract centroids with a scipy cKDTree
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+
+from .tract_boundaries import TractBoundaries, get_tract_boundaries
+from .tract_store import normalize_tract_fips
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Lat/lon in degrees -> 3D points on the unit sphere, so euclidean distance in the tree
+    ranks neighbours the same way great circle distance does (no distortion with latitude).
+    """
+    lat, lon = np.radians(lats), np.radians(lons)
+    return np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * np.arcsin(np.clip(chord / 2, 0, 1)) * EARTH_RADIUS_KM
+
+
+class TractNeighbors:
+    """cKDTree over tract centroids (representative points, always inside the polygon)."""
+
+    def __init__(self, boundaries: TractBoundaries):
+        points = shapely.point_on_surface(boundaries.geometries)
+        self.geoids = boundaries.geoids
+        self.lats = shapely.get_y(points)
+        self.lons = shapely.get_x(points)
+        self.tree = cKDTree(to_unit_vectors(self.lats, self.lons))
+        self._row_index = {geoid: i for i, geoid in enumerate(self.geoids.tolist())}
+
+    def nearest(self, tract_fips: str, k: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the k nearest other tracts to tract_fips as [{"tract_fips", "distance_km"}], nearest first.
+        None if the tract isn't in the boundary layer.
+        """
+        row = self._row_index.get(normalize_tract_fips(tract_fips))
+        if row is None:
+            return None
+        k = min(k + 1, len(self.geoids))
+        distances, rows = self.tree.query(self.tree.data[row], k=k)
+        distances, rows = np.atleast_1d(distances), np.atleast_1d(rows)
+        keep = rows != row
+        return [
+            {"tract_fips": str(self.geoids[r]), "distance_km": round(float(d), 3)}
+            for r, d in zip(rows[keep], chord_to_km(distances[keep]))
+        ]
+
+
+_neighbors: Optional[TractNeighbors] = None
+_neighbors_lock = threading.Lock()
+
+
+def get_tract_neighbors() -> TractNeighbors:
+    """Builds the centroid tree from the shared tract boundaries on first use."""
+    global _neighbors
+    if _neighbors is None:
+        with _neighbors_lock:
+            if _neighbors is None:
+                _neighbors = TractNeighbors(get_tract_boundaries())
+    return _neighbors
@@ -0,0 +1,178 @@
+# Column-oriented, FIPS-indexed store for the NRI census tract table
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+NRI_CSV_PATH = os.path.join(DATA_DIR, "NRI_Table_CensusTracts_Washington.csv")
+
+# Tract FIPS are 11 digits: 2 state + 3 county + 6 tract
+TRACT_FIPS_LENGTH = 11
+
+
+def normalize_tract_fips(tract_fips: Any) -> str:
+    """
+    Normalizes a tract FIPS to its canonical 11 character string form.
+    Handles ints/floats coming out of CSVs (which drop the leading zero) and stray whitespace.
+    """
+    fips = str(tract_fips).strip()
+    if fips.endswith(".0"):
+        fips = fips[:-2]
+    return fips.zfill(TRACT_FIPS_LENGTH)
+
+
+def to_python(value: Any) -> Any:
+    """Converts numpy scalars to plain python values so tool output stays JSON friendly."""
+    if isinstance(value, np.str_):
+        # Sharded string columns store missing values as ""
+        return str(value) or None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class TractStore:
+    """
+    Read-only NRI tract table stored column by column and keyed by tract FIPS.
+    Looking up one tract is a dict hit for the row, then one array index per requested field,
+    instead of a boolean scan over the whole DataFrame.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.fips = columns["TRACTFIPS"]
+        self._row_index = {fips: i for i, fips in enumerate(self.fips.tolist())}
+        # Sorted view of the FIPS column for vectorized (searchsorted) batch joins
+        self._order = np.argsort(self.fips, kind="stable")
+        self._sorted_fips = np.asarray(self.fips)[self._order]
+        # Hazard levels/percentiles are derived once per loaded table, not per request
+        from .risk_profile import RiskProfileTable
+
+        self.risk_profiles = RiskProfileTable(self)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "TractStore":
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        columns["TRACTFIPS"] = np.array(
+            [normalize_tract_fips(f) for f in df["TRACTFIPS"]]
+        )
+        return cls(columns)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "TractStore":
+        df = pd.read_csv(path, dtype={"TRACTFIPS": str}, low_memory=False)
+        return cls.from_dataframe(df)
+
+    def __len__(self) -> int:
+        return len(self.fips)
+
+    def __contains__(self, tract_fips: str) -> bool:
+        return normalize_tract_fips(tract_fips) in self._row_index
+
+    def row_for(self, tract_fips: str) -> Optional[int]:
+        return self._row_index.get(normalize_tract_fips(tract_fips))
+
+    def lookup(self, tract_fips: str, field_names: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns {field_name: value} for a single tract, or None if the tract isn't in the table.
+        Unknown field names map to None.
+        """
+        row = self.row_for(tract_fips)
+        if row is None:
+            return None
+        results = {}
+        for field_name in field_names:
+            column = self.columns.get(field_name)
+            results[field_name] = None if column is None else to_python(column[row])
+        return results
+
+    def risk_profile(self, tract_fips: str) -> Optional[Dict[str, Any]]:
+        return self.risk_profiles.lookup(tract_fips)
+
+    def rows_for(self, keys: np.ndarray) -> np.ndarray:
+        """Vectorized row lookup for an array of normalized tract FIPS. Missing tracts get -1."""
+        if len(self) == 0:
+            return np.full(len(keys), -1)
+        pos = np.searchsorted(self._sorted_fips, keys).clip(0, len(self) - 1)
+        found = self._sorted_fips[pos] == keys
+        return np.where(found, self._order[pos], -1)
+
+    def column_values(self, field_name: str, rows: np.ndarray) -> Optional[List[Any]]:
+        """Gathers one column for the given (valid) rows as python values. None if the column doesn't exist."""
+        column = self.columns.get(field_name)
+        if column is None:
+            return None
+        values = column[rows].tolist()
+        if column.dtype.kind == "U":
+            values = [v or None for v in values]
+        return values
+
+    def lookup_table(self, tract_fips_list: List[str], field_names: List[str]) -> Dict[str, Any]:
+        return lookup_table(lambda state_fips: self, tract_fips_list, field_names)
+
+
+def lookup_table(
+    shard_for_state: Callable[[str], Optional[TractStore]],
+    tract_fips_list: List[str],
+    field_names: List[str],
+) -> Dict[str, Any]:
+    """
+    Joins many tracts against many fields in one pass per state shard.
+    Returns a compact table:
+        {"fields": ["TRACTFIPS", *field_names], "rows": [[fips, v1, v2, ...], ...], "missing": [fips, ...]}
+    Rows keep the input order (deduplicated); tracts not in the data are listed under "missing"
+    and unknown field names come back as None.
+    """
+    keys = np.array(
+        list(dict.fromkeys(normalize_tract_fips(f) for f in tract_fips_list)), dtype=str
+    )
+    table = {name: np.full(len(keys), None, dtype=object) for name in field_names}
+    found = np.zeros(len(keys), dtype=bool)
+
+    states = keys.astype("U2")
+    for state_fips in np.unique(states):
+        store = shard_for_state(str(state_fips))
+        if store is None:
+            continue
+        positions = np.flatnonzero(states == state_fips)
+        rows = store.rows_for(keys[positions])
+        hit = rows >= 0
+        positions, rows = positions[hit], rows[hit]
+        found[positions] = True
+        for name in field_names:
+            values = store.column_values(name, rows)
+            if values is not None:
+                table[name][positions] = values
+
+    hit_positions = np.flatnonzero(found)
+    columns = [keys[hit_positions].tolist()] + [table[name][hit_positions].tolist() for name in field_names]
+    return {
+        "fields": ["TRACTFIPS"] + list(field_names),
+        "rows": [list(row) for row in zip(*columns)] if len(hit_positions) else [],
+        "missing": keys[~found].tolist(),
+    }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tract_store():
+    """
+    Returns the shared NRI tract store, creating it on first use.
+    Prefers the per-state memory-mapped shards (see nri_shards) and falls back to
+    loading the single Washington CSV into memory when no shards have been built.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from .nri_shards import ShardedTractStore, load_manifest
+
+                manifest = load_manifest()
+                if manifest is not None:
+                    _store = ShardedTractStore(manifest=manifest)
+                else:
+                    _store = TractStore.from_csv(NRI_CSV_PATH)
+    return _store
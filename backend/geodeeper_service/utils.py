@@ -5,6 +5,34 @@
 # Parse US Address
 import re
 
+# Common USPS street suffix / directional abbreviations used when normalizing addresses
+ADDRESS_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "boulevard": "blvd",
+    "road": "rd",
+    "drive": "dr",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "circle": "cir",
+    "square": "sq",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "northeast": "ne",
+    "northwest": "nw",
+    "southeast": "se",
+    "southwest": "sw",
+    "apartment": "apt",
+    "suite": "ste",
+}
+
 def parse_us_address(address: str):
     """
     Parses a US address string into street, city, and state.
@@ -25,4 +53,33 @@ def parse_us_address(address: str):
     else:
         # fallback: just take first two letters
         state = state_zip[:2]
-    return street, city, state
\ No newline at end of file
+    return street, city, state
+
+
+def split_us_address(address: str):
+    """
+    Lenient split of a one-line US address into (street, city, state, zip) for the Census batch geocoder.
+    Missing parts come back as "" (the batch service accepts the whole address in the street column).
+    """
+    parts = [p.strip() for p in address.split(",")]
+    if len(parts) < 3:
+        return address.strip(), "", "", ""
+    street, city = ", ".join(parts[:-2]), parts[-2]
+    match = re.match(r"([A-Za-z]{2})\s*(\d{5})?", parts[-1])
+    if not match:
+        return street, city, parts[-1], ""
+    return street, city, match.group(1).upper(), match.group(2) or ""
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an address for cache keys: lowercase, punctuation stripped, whitespace collapsed
+    and common suffixes/directionals abbreviated, with comma separated parts kept.
+    "1605 Boylston Avenue,  Seattle, WA 98122" -> "1605 boylston ave, seattle, wa 98122"
+    """
+    parts = []
+    for part in address.lower().split(","):
+        words = re.sub(r"[^\w\s-]", " ", part).split()
+        words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in words]
+        if words:
+            parts.append(" ".join(words))
+    return ", ".join(parts)
@@ -0,0 +1,70 @@
+# Application-lifetime pooled HTTP client shared by the API routes and the crew tools
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx[http2] not installed, stay on HTTP/1.1
+    HTTP2_AVAILABLE = False
+
+HTTP2_ENABLED = HTTP2_AVAILABLE and os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+HTTP_TIMEOUT = httpx.Timeout(
+    float(os.getenv("HTTP_TIMEOUT", 30)), connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 20)),
+    keepalive_expiry=30,
+)
+
+# An AsyncClient's connections belong to the event loop that opened them, so there is one client
+# per loop: the server's loop and the long-lived loop the crew tools run on (see tool_utils).
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the pooled client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_http_clients():
+    """Closes every pooled client, each on its own loop. Loops that have stopped are skipped."""
+    current = asyncio.get_running_loop()
+    for loop, client in list(_clients.items()):
+        if client.is_closed:
+            continue
+        if loop is current:
+            await client.aclose()
+        elif loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+    _clients.clear()
+
+
+@asynccontextmanager
+async def http_client_lifespan(app: Optional[object] = None):
+    """FastAPI lifespan: open the pool at startup, close all clients at shutdown."""
+    get_http_client()
+    try:
+        yield
+    finally:
+        await close_http_clients()
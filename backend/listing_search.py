@@ -0,0 +1,227 @@
+# Aggregated listing search: fetches result pages concurrently and yields deduplicated listings as
+# each page arrives, so collecting hundreds of listings is one fan-out instead of a page-by-page loop
+import asyncio
+import math
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from rapid_api import call_rapid_api
+from rate_limiter import Priority
+
+SEARCH_PAGE_SIZE = 200  # the API's max limit per page
+SEARCH_MAX_TOTAL = 1000
+SEARCH_CONCURRENCY = 4
+
+# Search endpoints by listing type, location search and coordinate search
+SEARCH_ENDPOINTS = {
+    "forsale": ("/search/forsale", "/search/forsale/coordinates"),
+    "forrent": ("/search/forrent", "/search/forrent/coordinates"),
+    "sold": ("/search/forsold", None),
+}
+
+# Where a search response keeps its listings and its total match count, checked in order.
+# The response shape isn't documented, so look in the usual places instead of assuming one.
+_LISTING_KEYS = ("properties", "listings", "results", "data", "home_search")
+_TOTAL_KEYS = ("total", "count", "matching_rows", "totalResultCount")
+
+# The listing fields the crew works with, as paths into a realtor.com search result. Search tools
+# project their output onto these (see crews/research_crew/tool_output.py) instead of returning
+# every photo, flag and branding block of each listing.
+LISTING_FIELDS = {
+    "property_id": "property_id",
+    "status": "status",
+    "price": "list_price|price",
+    "beds": "description.beds",
+    "baths": "description.baths_consolidated|description.baths",
+    "sqft": "description.sqft",
+    "lot_sqft": "description.lot_sqft",
+    "type": "description.type",
+    "year_built": "description.year_built",
+    "address": "location.address.line",
+    "city": "location.address.city",
+    "state": "location.address.state_code",
+    "zip": "location.address.postal_code",
+    "lat": "location.address.coordinate.lat",
+    "lon": "location.address.coordinate.lon",
+    "list_date": "list_date",
+    "agent": "advertisers.0.name",
+    "agent_phone": "advertisers.0.phones.0.number|advertisers.0.phone",
+    "agent_email": "advertisers.0.email",
+    "photo": "primary_photo.href",
+    "sold_price": "description.sold_price",
+    "sold_date": "description.sold_date",
+    "url": "permalink|href",
+}
+
+# A single property from the details endpoint: the listing fields plus what only the full record has
+PROPERTY_DETAIL_FIELDS = {
+    **LISTING_FIELDS,
+    "photos": "photos.*.href",
+    "text": "description.text",
+    "stories": "description.stories",
+    "garage": "description.garage",
+    "county": "location.county.name",
+    "county_fips": "location.county.fips_code",
+    "hoa_fee": "hoa.fee",
+    "price_per_sqft": "price_per_sqft",
+    "last_sold_price": "last_sold_price",
+    "last_sold_date": "last_sold_date",
+    "tax": "tax_history.0.tax",
+    "tax_year": "tax_history.0.year",
+    "flood_factor": "local.flood.flood_factor_score",
+    "fema_zone": "local.flood.fema_zone",
+    "fire_factor": "local.wildfire.fire_factor_score",
+    "features": "details.*.category",
+}
+
+
+def extract_listings(response: Any) -> List[Dict[str, Any]]:
+    """Listings in a search response, looking one level into nested dicts such as data.results."""
+    if isinstance(response, list):
+        return [item for item in response if isinstance(item, dict)]
+    if not isinstance(response, dict):
+        return []
+    for key in _LISTING_KEYS:
+        value = response.get(key)
+        if isinstance(value, list):
+            return [item for item in value if isinstance(item, dict)]
+        if isinstance(value, dict):
+            nested = extract_listings(value)
+            if nested:
+                return nested
+    return []
+
+
+def extract_total(response: Any) -> Optional[int]:
+    """Total number of matches the search reports, if it reports one."""
+    if not isinstance(response, dict):
+        return None
+    for key in _TOTAL_KEYS:
+        if isinstance(response.get(key), int):
+            return response[key]
+    for key in _LISTING_KEYS:
+        if isinstance(response.get(key), dict):
+            total = extract_total(response[key])
+            if total is not None:
+                return total
+    return None
+
+
+def listing_id(listing: Dict[str, Any]) -> Optional[str]:
+    for key in ("property_id", "listing_id", "id"):
+        if listing.get(key) is not None:
+            return str(listing[key])
+    return None
+
+
+def search_endpoint(listing_type: str, coordinates: bool = False) -> str:
+    if listing_type not in SEARCH_ENDPOINTS:
+        raise ValueError(
+            f"Unknown listing type {listing_type!r}, expected one of {', '.join(SEARCH_ENDPOINTS)}"
+        )
+    endpoint = SEARCH_ENDPOINTS[listing_type][1 if coordinates else 0]
+    if endpoint is None:
+        raise ValueError(f"Coordinate search is not available for {listing_type} listings")
+    return endpoint
+
+
+async def iter_listings(
+    endpoint: str,
+    params: Dict[str, Any],
+    total: int = SEARCH_PAGE_SIZE,
+    page_size: int = SEARCH_PAGE_SIZE,
+    concurrency: int = SEARCH_CONCURRENCY,
+    priority: Priority = Priority.BACKGROUND,
+    failed_pages: Optional[List[int]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields up to total unique listings (deduplicated by property_id) from a search endpoint.
+    Page 1 is fetched first to learn how many matches there are, then the remaining pages needed
+    are requested, up to concurrency at a time, and their listings yielded in arrival order.
+    A failure on the first page is raised. Later pages that fail (after the client's own retries)
+    are skipped and their numbers appended to failed_pages, so callers can tell the result is
+    incomplete.
+    """
+    total = max(1, min(total, SEARCH_MAX_TOTAL))
+    page_size = max(1, min(page_size, SEARCH_PAGE_SIZE))
+    seen = set()
+    yielded = 0
+
+    def fresh(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        unique = []
+        for listing in listings:
+            key = listing_id(listing)
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique.append(listing)
+        return unique
+
+    first = await call_rapid_api(endpoint, {**params, "page": 1, "limit": page_size}, priority=priority)
+    first_listings = extract_listings(first)
+    for listing in fresh(first_listings)[:total]:
+        yield listing
+        yielded += 1
+    if yielded >= total or len(first_listings) < page_size:
+        return
+
+    available = extract_total(first)
+    wanted = total if available is None else min(total, available)
+    last_page = math.ceil(wanted / page_size)
+    if last_page < 2:
+        return
+
+    async def fetch_page(page: int) -> List[Dict[str, Any]]:
+        try:
+            response = await call_rapid_api(
+                endpoint, {**params, "page": page, "limit": page_size}, priority=priority
+            )
+        except Exception:
+            if failed_pages is not None:
+                failed_pages.append(page)
+            return []
+        return extract_listings(response)
+
+    # At most `concurrency` pages are in flight or waiting to be consumed, and the next one is only
+    # requested once the caller has taken a finished page, so a slow consumer (e.g. a streaming
+    # client) holds back fetching instead of letting pages pile up in memory
+    pages = iter(range(2, last_page + 1))
+    pending = set()
+    try:
+        while True:
+            for page in pages:
+                pending.add(asyncio.ensure_future(fetch_page(page)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                for listing in fresh(finished.result()):
+                    yield listing
+                    yielded += 1
+                    if yielded >= total:
+                        return
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def search_listings(
+    endpoint: str,
+    params: Dict[str, Any],
+    total: int = SEARCH_PAGE_SIZE,
+    priority: Priority = Priority.BACKGROUND,
+) -> Dict[str, Any]:
+    """
+    Collects iter_listings into {"count", "listings", "failed_pages"}. A non-empty failed_pages
+    means those pages could not be fetched and the listings are incomplete.
+    """
+    failed_pages: List[int] = []
+    listings = [
+        listing
+        async for listing in iter_listings(
+            endpoint, params, total, priority=priority, failed_pages=failed_pages
+        )
+    ]
+    return {"count": len(listings), "listings": listings, "failed_pages": sorted(failed_pages)}
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from typing import Any, Dict, Optional
 from copilotkit.crewai import CrewAIAgent
 from copilotkit.integrations.fastapi import add_fastapi_endpoint
@@ -5,6 +7,7 @@ from copilotkit import CopilotKitRemoteEndpoint
 
 # Import CopilotKit FastAPI integration
 from crews.research_crew.crew_manager import ResearchCrew, kickoff_crew
+from crews.research_crew.map_renderer import shutdown_render_pool
 import os
 from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,12 +15,26 @@ from fastapi.responses import FileResponse, JSONResponse
 from fastapi import APIRouter
 from pydantic import BaseModel, HttpUrl, Field
 from realtor_router import router as realtor_router
+from http_client import http_client_lifespan
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Opens the shared HTTP connection pool at startup; on shutdown closes it and stops the map
+    # render worker processes
+    async with http_client_lifespan(app):
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(shutdown_render_pool)
+
+
 app = FastAPI(
     title="VetMyHomes API",
     description="API for VetMyHomes, providing real estate data using Realtor.com API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Set up CORS middleware
@@ -35,7 +52,7 @@ maps_router = APIRouter(prefix="/maps", tags=["maps"])
 
 @maps_router.get("/{filename}")
 async def get_map(filename: str):
-    """Serve map images from the maps directory"""
+    """Serve map files (png, webp, svg, geojson) from the maps directory"""
     # Define the maps directory path
     maps_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
 
@@ -50,7 +67,8 @@ async def get_map(filename: str):
         raise HTTPException(status_code=404, detail="Map not found")
 
     # Return the file as a response
-    return FileResponse(file_path)
+    media_type = "application/geo+json" if filename.endswith(".geojson") else None
+    return FileResponse(file_path, media_type=media_type)
 
 
 # Include routers
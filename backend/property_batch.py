@@ -0,0 +1,78 @@
+# Batch property lookups: details, photos and environment risk for a page of property IDs in one
+# call, fetched concurrently under a shared limit with a success or error per ID
+import asyncio
+from typing import Any, Dict, Sequence
+
+from rapid_api import RapidAPIError, call_rapid_api
+from rate_limiter import Priority
+
+PROPERTY_BATCH_MAX_IDS = 50
+PROPERTY_BATCH_CONCURRENCY = 8
+
+# What a batch can include for each property, by the endpoint that returns it
+PROPERTY_PARTS = {
+    "details": "/property/details",
+    "photos": "/property/photos",
+    "environment_risk": "/property/environment_risk",
+}
+
+
+def _error(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, RapidAPIError):
+        return {"status_code": e.status_code, "detail": e.detail}
+    return {"detail": str(e) or type(e).__name__}
+
+
+async def fetch_properties(
+    property_ids: Sequence[str],
+    include: Sequence[str] = ("details",),
+    concurrency: int = PROPERTY_BATCH_CONCURRENCY,
+    priority: Priority = Priority.BACKGROUND,
+) -> Dict[str, Any]:
+    """
+    Fetches the included parts for each property ID (duplicates dropped, order kept), at most
+    concurrency upstream requests at a time. One failing lookup doesn't fail the batch: each
+    result has the parts that succeeded and an "errors" dict for the ones that didn't, and
+    "ok" is true only when every part succeeded.
+    """
+    ids = list(dict.fromkeys(str(property_id) for property_id in property_ids if property_id))
+    parts = list(dict.fromkeys(include))
+    unknown = [part for part in parts if part not in PROPERTY_PARTS]
+    if unknown:
+        raise ValueError(
+            f"Unknown part(s) {', '.join(unknown)}, expected any of {', '.join(PROPERTY_PARTS)}"
+        )
+    if not ids or not parts:
+        raise ValueError("At least one property ID and one part must be provided")
+    if len(ids) > PROPERTY_BATCH_MAX_IDS:
+        raise ValueError(f"At most {PROPERTY_BATCH_MAX_IDS} property IDs per batch, got {len(ids)}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(property_id: str, part: str):
+        async with semaphore:
+            return await call_rapid_api(
+                PROPERTY_PARTS[part], {"property_id": property_id}, priority=priority
+            )
+
+    lookups = [(property_id, part) for property_id in ids for part in parts]
+    responses = await asyncio.gather(
+        *(fetch(property_id, part) for property_id, part in lookups), return_exceptions=True
+    )
+
+    results = {property_id: {"property_id": property_id, "ok": True} for property_id in ids}
+    for (property_id, part), response in zip(lookups, responses):
+        result = results[property_id]
+        if isinstance(response, Exception):
+            result["ok"] = False
+            result.setdefault("errors", {})[part] = _error(response)
+        else:
+            result[part] = response
+
+    succeeded = sum(result["ok"] for result in results.values())
+    return {
+        "count": len(ids),
+        "succeeded": succeeded,
+        "failed": len(ids) - succeeded,
+        "results": list(results.values()),
+    }
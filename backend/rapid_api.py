@@ -0,0 +1,82 @@
+# Authenticated requests to the RapidAPI Realtor API, shared by the API router and the crew tools
+import asyncio
+import random
+from typing import Any, Dict
+
+from config import settings
+from http_client import get_http_client
+from response_cache import cache_key, get_response_cache
+from rate_limiter import (
+    BACKOFF_BASE,
+    RAPIDAPI_MAX_RETRIES,
+    Priority,
+    QuotaExhausted,
+    backoff_delay,
+    get_rate_limiter,
+)
+from singleflight import SingleFlight
+
+# Base URL for RapidAPI Realtor API
+BASE_URL = "https://realtor16.p.rapidapi.com"
+
+# Identical requests already on their way upstream are shared rather than sent again
+_single_flight = SingleFlight()
+
+
+class RapidAPIError(Exception):
+    """Non-200 response from RapidAPI. The router turns it into an HTTPException with the same status."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def call_rapid_api(
+    endpoint: str, params: Dict[str, Any] = None, priority: Priority = Priority.BACKGROUND
+):
+    """
+    Make an authenticated request to RapidAPI, answered from the response cache when a recent
+    enough copy exists (per-endpoint TTLs, see response_cache). Concurrent misses for the same
+    endpoint and params share one upstream request.
+    Requests that do go upstream wait for the rate limiter; INTERACTIVE ones are let through
+    ahead of BACKGROUND (crew) traffic.
+    """
+    key = cache_key(endpoint, params)
+    return await get_response_cache().get_or_fetch(
+        endpoint,
+        params,
+        lambda: _single_flight.do(key, lambda: _fetch_rapid_api(endpoint, params, priority)),
+    )
+
+
+async def _fetch_rapid_api(
+    endpoint: str, params: Dict[str, Any] = None, priority: Priority = Priority.BACKGROUND
+):
+    """Make an authenticated request to RapidAPI over the shared connection pool, retrying 429s."""
+    url = f"{BASE_URL}{endpoint}"
+    headers = {
+        "X-RapidAPI-Key": settings.RAPIDAPI_KEY,
+        "X-RapidAPI-Host": settings.RAPIDAPI_HOST,
+    }
+    limiter = get_rate_limiter()
+
+    for attempt in range(RAPIDAPI_MAX_RETRIES + 1):
+        try:
+            await limiter.acquire(endpoint, priority)
+        except QuotaExhausted as e:
+            raise RapidAPIError(429, f"RapidAPI error: {e}")
+        response = await get_http_client().get(url, headers=headers, params=params)
+        retry_after = limiter.record_response(endpoint, response.status_code, response.headers)
+        if response.status_code != 429 or attempt == RAPIDAPI_MAX_RETRIES:
+            break
+        # With Retry-After the limiter already holds everyone back until then; the jitter keeps
+        # the queued retries from landing in the same instant
+        await asyncio.sleep(
+            backoff_delay(attempt) if retry_after is None else random.uniform(0, BACKOFF_BASE)
+        )
+
+    if response.status_code != 200:
+        raise RapidAPIError(response.status_code, f"RapidAPI error: {response.text}")
+
+    return response.json()
@@ -0,0 +1,211 @@
+# Client-side rate limiting for RapidAPI: token buckets shared by the router and the crew tools,
+# Retry-After aware backoff, per-endpoint quota accounting and interactive-first scheduling
+import asyncio
+import email.utils
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+# Requests per second allowed by the RapidAPI plan, and how many may go out back to back
+RAPIDAPI_RATE_LIMIT = float(os.getenv("RAPIDAPI_RATE_LIMIT", 5))
+RAPIDAPI_BURST = int(os.getenv("RAPIDAPI_BURST", 1))
+# Optional tighter limits for specific endpoint prefixes, e.g. {"/search/": 2}
+RAPIDAPI_ENDPOINT_RATES: Dict[str, float] = json.loads(os.getenv("RAPIDAPI_ENDPOINT_RATES", "{}"))
+# Once the plan's remaining quota drops to this, background (crew) calls are refused so the
+# remainder is kept for interactive requests
+RAPIDAPI_QUOTA_RESERVE = int(os.getenv("RAPIDAPI_QUOTA_RESERVE", 50))
+RAPIDAPI_MAX_RETRIES = int(os.getenv("RAPIDAPI_MAX_RETRIES", 3))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# After a 429 the bucket rate is halved, then creeps back up by this fraction per success
+RATE_RECOVERY = 0.05
+MIN_RATE_FRACTION = 0.1
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # API router requests a user is waiting on
+    BACKGROUND = 1  # crew tool calls
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now; the header may be a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. The router and the crew tools run on different event loops, so this
+    uses a threading lock and polls with asyncio.sleep instead of loop-bound primitives.
+    Waiters are served strictly in (priority, arrival) order.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait_time(self, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self, priority: Priority = Priority.BACKGROUND):
+        ticket = (int(priority), next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._wait_time(now)
+                    if self._waiting[0] == ticket and delay == 0:
+                        heapq.heappop(self._waiting)
+                        self.tokens -= 1
+                        return
+                    if self._waiting[0] != ticket:
+                        # Someone ahead of us gets the next token
+                        delay = max(delay, 1 / self.rate)
+                await asyncio.sleep(min(delay, 1.0))
+        except BaseException:
+            with self._lock:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+            raise
+
+    def throttled(self, retry_after: Optional[float]):
+        """Upstream said 429: pause everyone for retry_after and halve the rate."""
+        with self._lock:
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+
+
+class RateLimiter:
+    """
+    One global bucket for the plan's rate limit, plus optional buckets for endpoint prefixes with
+    their own limits. Also tracks calls per endpoint and the plan quota RapidAPI reports back in
+    its x-ratelimit-requests-remaining header.
+    """
+
+    def __init__(
+        self,
+        rate: float = RAPIDAPI_RATE_LIMIT,
+        burst: int = RAPIDAPI_BURST,
+        endpoint_rates: Dict[str, float] = RAPIDAPI_ENDPOINT_RATES,
+        quota_reserve: int = RAPIDAPI_QUOTA_RESERVE,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.endpoint_buckets = {
+            prefix: TokenBucket(endpoint_rate, max(1, int(endpoint_rate)))
+            for prefix, endpoint_rate in endpoint_rates.items()
+        }
+        self.quota_reserve = quota_reserve
+        self.quota_remaining: Optional[int] = None
+        self.calls: Dict[str, int] = {}
+        self.throttled_calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint_bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        matches = [prefix for prefix in self.endpoint_buckets if endpoint.startswith(prefix)]
+        return self.endpoint_buckets[max(matches, key=len)] if matches else None
+
+    async def acquire(self, endpoint: str, priority: Priority = Priority.BACKGROUND):
+        if (
+            priority != Priority.INTERACTIVE
+            and self.quota_remaining is not None
+            and self.quota_remaining <= self.quota_reserve
+        ):
+            raise QuotaExhausted(
+                f"RapidAPI quota nearly used up ({self.quota_remaining} requests left), "
+                "remaining requests are reserved for interactive use"
+            )
+        endpoint_bucket = self._endpoint_bucket(endpoint)
+        if endpoint_bucket is not None:
+            await endpoint_bucket.acquire(priority)
+        await self.bucket.acquire(priority)
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def record_response(self, endpoint: str, status_code: int, headers) -> Optional[float]:
+        """
+        Updates quota and adaptive rate from a response. Returns the delay before retrying when the
+        response was a 429, otherwise None.
+        """
+        remaining = headers.get("x-ratelimit-requests-remaining")
+        if remaining is not None and remaining.isdigit():
+            self.quota_remaining = int(remaining)
+        buckets = [self.bucket, self._endpoint_bucket(endpoint)]
+        buckets = [bucket for bucket in buckets if bucket is not None]
+        if status_code != 429:
+            for bucket in buckets:
+                bucket.succeeded()
+            return None
+        with self._lock:
+            self.throttled_calls[endpoint] = self.throttled_calls.get(endpoint, 0) + 1
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        for bucket in buckets:
+            bucket.throttled(retry_after)
+        return retry_after
+
+    def usage(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "throttled": dict(self.throttled_calls),
+                "quota_remaining": self.quota_remaining,
+                "rate": round(self.bucket.rate, 3),
+            }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
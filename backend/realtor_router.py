@@ -1,35 +1,28 @@
+import json
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-import httpx
-from config import settings
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from listing_search import SEARCH_MAX_TOTAL, iter_listings, search_endpoint
+from property_batch import PROPERTY_BATCH_MAX_IDS, fetch_properties
+from rapid_api import RapidAPIError
+from rapid_api import call_rapid_api as _call_rapid_api
+from rate_limiter import Priority
 
 router = APIRouter(prefix="/realtor", tags=["realtor"])
 
-# Base URL for RapidAPI Realtor API
-BASE_URL = "https://realtor16.p.rapidapi.com"
-
 
 # Helper function to make authenticated requests to RapidAPI
 async def call_rapid_api(endpoint: str, params: Dict[str, Any] = None):
-    """Make an authenticated request to RapidAPI."""
-    url = f"{BASE_URL}{endpoint}"
-    headers = {
-        "X-RapidAPI-Key": settings.RAPIDAPI_KEY,
-        "X-RapidAPI-Host": settings.RAPIDAPI_HOST,
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"RapidAPI error: {response.text}",
-            )
-
-        return response.json()
+    """
+    Make an authenticated request to RapidAPI, surfacing failures as HTTP errors.
+    Someone is waiting on these, so they go ahead of queued crew tool calls.
+    """
+    try:
+        return await _call_rapid_api(endpoint, params, priority=Priority.INTERACTIVE)
+    except RapidAPIError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 
 # Enum for sorting options
@@ -193,6 +186,118 @@ async def search_forsold(
     return await call_rapid_api("/search/forsold", params)
 
 
+# -------------------- Streaming Search Endpoint --------------------
+
+
+class SearchListingType(str, Enum):
+    FORSALE = "forsale"
+    FORRENT = "forrent"
+    SOLD = "sold"
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+
+STREAM_MEDIA_TYPES = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.SSE: "text/event-stream",
+}
+
+
+def _stream_event(fmt: StreamFormat, event: str, data: Any) -> str:
+    payload = json.dumps(data, separators=(",", ":"))
+    if fmt == StreamFormat.SSE:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+@router.get("/search/stream")
+async def search_stream(
+    listing_type: SearchListingType = Query(
+        SearchListingType.FORSALE, description="forsale, forrent or sold"
+    ),
+    location: Optional[str] = Query(None, description="Location for searching properties"),
+    latitude: Optional[float] = Query(None, description="Latitude, to search around coordinates instead"),
+    longitude: Optional[float] = Query(None, description="Longitude, to search around coordinates instead"),
+    radius: int = Query(10, ge=1, le=50, description="Radius in kilometers around the coordinates (max: 50)"),
+    search_radius: int = Query(
+        0, ge=0, le=50, description="Radius in kilometers around the location (max: 50)"
+    ),
+    sort: SortOption = Query(
+        SortOption.RELEVANT, description="Sorting option for the results"
+    ),
+    total: int = Query(
+        200, ge=1, le=SEARCH_MAX_TOTAL, description=f"How many listings to return (max: {SEARCH_MAX_TOTAL})"
+    ),
+    format: StreamFormat = Query(StreamFormat.NDJSON, description="ndjson or sse"),
+):
+    """
+    Stream listings as they arrive, fetching the pages needed to reach total concurrently and
+    dropping duplicates. NDJSON sends one listing per line. SSE sends "listing" events, then a
+    "done" event with the count and failed_pages.
+
+    A page after the first that can't be fetched is skipped. Once the other listings have been
+    sent, a {"partial": true, "failed_pages": [...]} line or a "partial" event says the result
+    is incomplete. Any other failure mid-stream ends it with an {"error": ...} line or "error" event.
+    """
+    coordinates = latitude is not None and longitude is not None
+    if not coordinates and not location:
+        raise HTTPException(
+            status_code=400, detail="Either location or latitude and longitude must be provided"
+        )
+    try:
+        endpoint = search_endpoint(listing_type.value, coordinates)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if coordinates:
+        params = {"latitude": latitude, "longitude": longitude, "radius": radius, "sort": sort}
+    else:
+        params = {"location": location, "search_radius": search_radius, "sort": sort}
+
+    failed_pages: List[int] = []
+    listings = iter_listings(
+        endpoint, params, total, priority=Priority.INTERACTIVE, failed_pages=failed_pages
+    )
+    # Wait for the first page before answering, so an upstream failure is still a proper HTTP error
+    try:
+        first = await listings.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except RapidAPIError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async def events() -> AsyncIterator[str]:
+        count = 0
+        try:
+            if first is not None:
+                yield _stream_event(format, "listing", first)
+                count += 1
+                async for listing in listings:
+                    yield _stream_event(format, "listing", listing)
+                    count += 1
+        except Exception as e:
+            yield _stream_event(format, "error", {"error": str(e)})
+            return
+        finally:
+            # Client gone or stream finished: stop any page fetches still running
+            await listings.aclose()
+        if failed_pages:
+            yield _stream_event(
+                format, "partial", {"partial": True, "failed_pages": sorted(failed_pages)}
+            )
+        if format == StreamFormat.SSE:
+            yield _stream_event(format, "done", {"count": count, "failed_pages": sorted(failed_pages)})
+
+    return StreamingResponse(
+        events(),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # -------------------- Suggestions Endpoint --------------------
 
 
@@ -323,6 +428,71 @@ async def get_property_environment_risk(
     return await call_rapid_api("/property/environment_risk", params)
 
 
+# -------------------- Batch Property Endpoints --------------------
+
+
+class PropertyPart(str, Enum):
+    DETAILS = "details"
+    PHOTOS = "photos"
+    ENVIRONMENT_RISK = "environment_risk"
+
+
+async def _property_batch(property_ids: List[str], include: List[PropertyPart]):
+    try:
+        return await fetch_properties(
+            property_ids, [part.value for part in include], priority=Priority.INTERACTIVE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/property/batch")
+async def get_property_batch(
+    property_ids: List[str] = Query(
+        ..., description=f"IDs of the properties (max: {PROPERTY_BATCH_MAX_IDS})"
+    ),
+    include: List[PropertyPart] = Query(
+        [PropertyPart.DETAILS, PropertyPart.PHOTOS, PropertyPart.ENVIRONMENT_RISK],
+        description="What to fetch for each property",
+    ),
+):
+    """
+    Get details, photos and/or environmental risk for a page of properties in one call.
+    Each property gets its own result with the parts that succeeded and the errors for the rest.
+    """
+    return await _property_batch(property_ids, include)
+
+
+@router.get("/property/details/batch")
+async def get_property_details_batch(
+    property_ids: List[str] = Query(
+        ..., description=f"IDs of the properties (max: {PROPERTY_BATCH_MAX_IDS})"
+    ),
+):
+    """Get detailed information for many properties"""
+    return await _property_batch(property_ids, [PropertyPart.DETAILS])
+
+
+@router.get("/property/photos/batch")
+async def get_property_photos_batch(
+    property_ids: List[str] = Query(
+        ..., description=f"IDs of the properties (max: {PROPERTY_BATCH_MAX_IDS})"
+    ),
+):
+    """Get photos for many properties"""
+    return await _property_batch(property_ids, [PropertyPart.PHOTOS])
+
+
+@router.get("/property/environment_risk/batch")
+async def get_property_environment_risk_batch(
+    property_ids: List[str] = Query(
+        ..., description=f"IDs of the properties (max: {PROPERTY_BATCH_MAX_IDS})"
+    ),
+):
+    """Get environmental risk information for many properties"""
+    return await _property_batch(property_ids, [PropertyPart.ENVIRONMENT_RISK])
+
+
 class PropertyStatus(str, Enum):
     FOR_SALE = "for_sale"
     FOR_RENT = "for_rent"
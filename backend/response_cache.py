@@ -0,0 +1,222 @@
+# TTL response cache for RapidAPI calls: in-memory LRU, optional shared SQLite tier, and
+# stale-while-revalidate so callers get an instant answer while a refresh runs in the background
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Seconds a response is fresh, by endpoint (longest matching prefix wins)
+DEFAULT_ENDPOINT_TTLS = {
+    "/search/": 5 * 60,
+    "/suggestion": 24 * 3600,
+    "/agent": 24 * 3600,  # router's /agent/* and the tools' /agents*
+    "/property/details": 3600,
+    "/property/similar_homes": 3600,
+    "/property/photos": 7 * 24 * 3600,
+    "/property/environment_risk": 7 * 24 * 3600,
+    "/market/details": 24 * 3600,
+    "/housing_market_details": 24 * 3600,
+}
+RESPONSE_CACHE_DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_DEFAULT_TTL", 15 * 60))
+# JSON object of endpoint prefix -> seconds, merged over the defaults; 0 disables caching for it
+RESPONSE_CACHE_TTLS = {
+    **DEFAULT_ENDPOINT_TTLS,
+    **json.loads(os.getenv("RESPONSE_CACHE_TTLS", "{}")),
+}
+# How long past its TTL an entry may still be served while it is refreshed in the background
+RESPONSE_CACHE_MAX_STALE = int(os.getenv("RESPONSE_CACHE_MAX_STALE", 24 * 3600))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000))
+# Set to a file path to share cached responses between workers and restarts
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH")
+
+# Only check the disk table size every N writes to keep set() cheap
+_EVICT_EVERY = 100
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """endpoint + params with None dropped, enums reduced to values and keys sorted."""
+    canonical = {k: _canonical(v) for k, v in (params or {}).items() if v is not None}
+    payload = json.dumps([endpoint, canonical], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class DiskTier:
+    """Responses in an SQLite table (WAL), shared by every worker on the host."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._connect().execute(
+            "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else (json.loads(row[0]), row[1])
+
+    def set(self, key: str, value: Any, stored_at: float):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), stored_at),
+        )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drops the oldest responses beyond max_entries."""
+        conn = self._connect()
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY stored_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+
+class ResponseCache:
+    """
+    Fresh entries are returned as-is. Entries past their endpoint's TTL but within max_stale are
+    returned immediately while one background fetch refreshes them. Anything older, or missing,
+    is fetched inline. Failed fetches are never cached.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, int] = RESPONSE_CACHE_TTLS,
+        default_ttl: int = RESPONSE_CACHE_DEFAULT_TTL,
+        max_stale: int = RESPONSE_CACHE_MAX_STALE,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        path: Optional[str] = RESPONSE_CACHE_PATH,
+    ):
+        # Longest prefix first so "/property/photos" beats a shorter "/property" entry
+        self.ttls = sorted(ttls.items(), key=lambda item: len(item[0]), reverse=True)
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.disk = DiskTier(path, max_entries * 10) if path else None
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._revalidating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def ttl_for(self, endpoint: str) -> int:
+        for prefix, ttl in self.ttls:
+            if endpoint.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def _get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+            return entry
+        return None
+
+    def _remember(self, key: str, entry: Tuple[Any, float]):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def set(self, key: str, value: Any):
+        entry = (value, time.time())
+        self._remember(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, *entry)
+
+    async def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        self.set(key, value)
+        return value
+
+    async def _revalidate(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        try:
+            await self._refresh(key, fetch)
+        except Exception:
+            # Keep serving the stale copy; the next caller past its TTL tries again
+            pass
+        finally:
+            self._revalidating.discard(key)
+
+    async def get_or_fetch(
+        self, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return await fetch()
+        key = cache_key(endpoint, params)
+        entry = self._get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                return value
+            if age < ttl + self.max_stale:
+                if key not in self._revalidating:
+                    self._revalidating.add(key)
+                    task = asyncio.create_task(self._revalidate(key, fetch))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return value
+        return await self._refresh(key, fetch)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.disk is not None:
+            self.disk._connect().execute("DELETE FROM responses")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
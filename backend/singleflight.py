@@ -0,0 +1,60 @@
+# Single-flight request coalescing: concurrent calls with the same key share one upstream request
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    do(key, fn) runs fn() once for all callers that arrive while it is in flight; they all get its
+    result or its exception. The key is forgotten as soon as the call finishes, so later callers
+    start a fresh request (caching is the response cache's job, not this one's).
+
+    A caller being cancelled doesn't cancel the request for the others. If every caller has been
+    cancelled, the upstream request is cancelled too.
+
+    Calls are scoped to the running event loop, since a task can only be awaited on its own loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Call] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        call = self._calls.get(call_key)
+        if call is None:
+            call = _Call(loop.create_task(fn()))
+            self._calls[call_key] = call
+            call.task.add_done_callback(lambda task: self._finished(call_key, call, task))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Last one waiting: nobody wants the result any more. Forget it right away so a
+                # caller arriving before the cancellation lands starts a new request
+                if self._calls.get(call_key) is call:
+                    del self._calls[call_key]
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _finished(self, call_key, call: _Call, task: asyncio.Task):
+        if self._calls.get(call_key) is call:
+            del self._calls[call_key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter was cancelled before it was raised
+            task.exception()
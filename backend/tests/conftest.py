@@ -0,0 +1,7 @@
+# Tests run from the backend directory: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# config.Settings requires a key; the tests never reach the real API
+os.environ.setdefault("RAPIDAPI_KEY", "test-key")
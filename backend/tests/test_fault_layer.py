@@ -0,0 +1,62 @@
+# nearest_fault_distance attribute lookup across fault datasets with different column names
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString
+
+from crews.research_crew import fault_layer
+from crews.research_crew.fault_layer import FaultLayer, nearest_fault_distance
+from crews.research_crew.fault_tiles import TiledFaultLayer, build_fault_tiles
+
+SEATTLE = (47.6062, -122.3321)
+
+
+def fault_frame(columns) -> gpd.GeoDataFrame:
+    # A short north-south fault about 1.5 km east of the point
+    lat, lon = SEATTLE
+    line = LineString([(lon + 0.02, lat - 0.02), (lon + 0.02, lat + 0.02)])
+    return gpd.GeoDataFrame(
+        {column: [value] for column, value in columns.items()}, geometry=[line], crs="EPSG:4326"
+    )
+
+
+EXPECTED = {
+    "fault_name": "Seattle fault zone",
+    "section_name": "Frontal fault",
+    "slip_rate": "Between 0.2 and 1.0 mm/yr",
+    "age": "<15,000",
+}
+
+
+@pytest.mark.parametrize(
+    "columns",
+    [
+        {"FAULT_NAME": EXPECTED["fault_name"], "SECTION_NA": EXPECTED["section_name"],
+         "SLIP_RATE": EXPECTED["slip_rate"], "AGE": EXPECTED["age"]},
+        {"fault_name": EXPECTED["fault_name"], "section_name": EXPECTED["section_name"],
+         "slip_rate": EXPECTED["slip_rate"], "age": EXPECTED["age"]},
+        {"Name": EXPECTED["fault_name"], "Section": EXPECTED["section_name"],
+         "SlipRate": EXPECTED["slip_rate"], "Age_Class": EXPECTED["age"]},
+    ],
+)
+def test_attributes_resolve_regardless_of_column_names(monkeypatch, columns):
+    monkeypatch.setattr(fault_layer, "_fault_layer", FaultLayer(fault_frame(columns)))
+
+    (result,) = nearest_fault_distance([SEATTLE[0]], [SEATTLE[1]])
+    assert 1.0 < result["distance_km"] < 2.0
+    assert {key: result[key] for key in EXPECTED} == EXPECTED
+
+
+def test_tiled_layer_with_lowercase_columns(monkeypatch, tmp_path):
+    source = str(tmp_path / "faults.geojson")
+    fault_frame({"fault_name": EXPECTED["fault_name"], "slip_rate": EXPECTED["slip_rate"]}).to_file(
+        source, driver="GeoJSON"
+    )
+    out_dir = str(tmp_path / "tiles")
+    monkeypatch.setattr(
+        fault_layer, "_fault_layer", TiledFaultLayer(out_dir, build_fault_tiles(source, out_dir))
+    )
+
+    (result,) = nearest_fault_distance([SEATTLE[0]], [SEATTLE[1]])
+    assert result["fault_name"] == EXPECTED["fault_name"]
+    assert result["slip_rate"] == EXPECTED["slip_rate"]
+    assert result["age"] is None
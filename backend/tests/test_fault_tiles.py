@@ -0,0 +1,48 @@
+# Fault tile build and tiled lookups on a small synthetic fault set
+import geopandas as gpd
+from shapely.geometry import LineString
+
+from crews.research_crew.fault_layer import FAULT_CRS
+from crews.research_crew.fault_tiles import TILE_FAULT_ID, TiledFaultLayer, build_fault_tiles
+
+TILE_SIZE = 10_000
+
+
+def write_source(tmp_path) -> str:
+    # The second fault crosses the x = 10 km tile edge, so it is stored in two tiles
+    faults = gpd.GeoDataFrame(
+        {
+            "fault_id": ["US-1", "US-2", "US-3"],
+            "fault_name": ["Alpha", "Beta", "Gamma"],
+        },
+        geometry=[
+            LineString([(1_000, 1_000), (4_000, 4_000)]),
+            LineString([(8_000, 5_000), (12_000, 5_000)]),
+            LineString([(25_000, 25_000), (28_000, 28_000)]),
+        ],
+        crs=FAULT_CRS,
+    )
+    path = str(tmp_path / "faults.geojson")
+    faults.to_file(path, driver="GeoJSON")
+    return path
+
+
+def test_build_keeps_existing_fault_id_column(tmp_path):
+    out_dir = str(tmp_path / "tiles")
+    manifest = build_fault_tiles(write_source(tmp_path), out_dir, TILE_SIZE)
+
+    assert manifest["faults"] == 3
+    layer = TiledFaultLayer(out_dir, manifest)
+    hits = layer.query(0, 0, 20_000, 10_000)
+    assert hits["fault_id"].tolist() == ["US-1", "US-2"]
+    assert TILE_FAULT_ID not in hits.columns
+
+
+def test_nearest_deduplicates_faults_across_tiles(tmp_path):
+    out_dir = str(tmp_path / "tiles")
+    layer = TiledFaultLayer(out_dir, build_fault_tiles(write_source(tmp_path), out_dir, TILE_SIZE))
+
+    faults, rows, distances = layer.nearest([10_000.0], [6_000.0], 5_000)
+    assert faults[TILE_FAULT_ID].is_unique
+    assert faults["fault_name"].iloc[rows[0]] == "Beta"
+    assert distances[0] == 1_000
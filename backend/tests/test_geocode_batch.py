@@ -0,0 +1,126 @@
+# Census batch geocoding against a mock addressbatch endpoint (httpx.MockTransport)
+import asyncio
+import csv
+import io
+
+import httpx
+import pytest
+
+import http_client
+from geodeeper_service import geo_service, geocode_cache
+from geodeeper_service.geo_service import geocode_addresses_batch
+
+ADDRESSES = [
+    "1605 Boylston Ave, Seattle, WA 98122",
+    "400 Broad St, Seattle, WA 98109",
+    "1 Nowhere Rd, Faketown, WA 99999",
+    "500 Pine St, Seattle, WA 98101",
+    "1301 2nd Ave, Seattle, WA 98101",
+    "85 Pike St, Seattle, WA 98101",
+    "2 Nowhere Rd, Faketown, WA 99999",
+]
+
+
+class MockAddressBatch:
+    """
+    Mimics the Census addressbatch endpoint: reads the uploaded CSV (id, street, city, state, zip)
+    and answers in its CSV format. Streets containing "Nowhere" come back as No_Match.
+    """
+
+    def __init__(self):
+        self.uploads = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = request.read().decode()
+        csv_part = body.split('filename="addresses.csv"', 1)[1]
+        csv_text = csv_part.split("\r\n\r\n", 1)[1].rsplit("\r\n--", 1)[0]
+        records = list(csv.reader(io.StringIO(csv_text)))
+        self.uploads.append(records)
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for record_id, street, city, state, zip_code in records:
+            address = f"{street}, {city}, {state}, {zip_code}"
+            if "Nowhere" in street:
+                writer.writerow([record_id, address, "No_Match"])
+                continue
+            number = int(street.split()[0])
+            writer.writerow([
+                record_id, address, "Match", "Exact", address.upper(),
+                f"{-122.3 - number / 1e5},{47.6 + number / 1e5}", "123456", "L", "53", "033", f"{number:06d}", "1001",
+            ])
+        return httpx.Response(200, text=out.getvalue())
+
+    def install(self):
+        loop = asyncio.get_running_loop()
+        http_client._clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        geocode_cache, "_cache", geocode_cache.GeocodeCache(path=str(tmp_path / "geocode.sqlite3"))
+    )
+    monkeypatch.setattr(geo_service, "_single_flight", geo_service.SingleFlight())
+
+
+def run_batch(upstream: MockAddressBatch, addresses, chunk_size=3):
+    async def main():
+        upstream.install()
+        return await geocode_addresses_batch(addresses, chunk_size=chunk_size)
+
+    return asyncio.run(main())
+
+
+def test_results_come_back_in_input_order_across_chunks():
+    upstream = MockAddressBatch()
+    results = run_batch(upstream, ADDRESSES, chunk_size=3)
+
+    assert [len(records) for records in upstream.uploads] in ([3, 3, 1], [3, 1, 3], [1, 3, 3])
+    assert len(results) == len(ADDRESSES)
+    for address, result in zip(ADDRESSES, results):
+        if "Nowhere" in address:
+            assert "error" in result
+        else:
+            number = int(address.split()[0])
+            assert result["tract_fips"] == f"53033{number:06d}"
+            assert result["block_group"] == f"53033{number:06d}1"
+            assert result["latitude"] == pytest.approx(47.6 + number / 1e5)
+
+
+def test_duplicates_are_sent_once():
+    upstream = MockAddressBatch()
+    addresses = ADDRESSES[:2] + ADDRESSES[:2] + [ADDRESSES[0].upper()]
+    results = run_batch(upstream, addresses, chunk_size=10)
+
+    assert [len(records) for records in upstream.uploads] == [2]
+    assert results[0] == results[2] == results[4]
+    assert results[1] == results[3]
+
+
+def test_no_match_is_cached_as_negative_and_not_uploaded_again():
+    upstream = MockAddressBatch()
+    first = run_batch(upstream, ADDRESSES)
+    uploads = len(upstream.uploads)
+
+    cached = geocode_cache.get_geocode_cache().get("geocode", ADDRESSES[2])
+    assert cached is not None and "error" in cached
+
+    # Everything, matches and non-matches alike, is answered from the cache the second time
+    second = run_batch(upstream, ADDRESSES)
+    assert len(upstream.uploads) == uploads
+    assert second == first
+
+
+def test_failed_upload_returns_errors_and_caches_nothing():
+    def failing(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, text="unavailable")
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        http_client._clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(failing))
+        return await geocode_addresses_batch(ADDRESSES[:2])
+
+    results = asyncio.run(main())
+    assert all("error" in result for result in results)
+    assert geocode_cache.get_geocode_cache().get("geocode", ADDRESSES[0]) is None
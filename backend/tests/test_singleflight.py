@@ -0,0 +1,133 @@
+# Single-flight coalescing of RapidAPI calls, against a mock upstream (httpx.MockTransport)
+import asyncio
+
+import httpx
+import pytest
+
+import http_client
+import rapid_api
+import rate_limiter
+import response_cache
+from rapid_api import RapidAPIError, call_rapid_api
+
+CALLERS = 20
+
+
+class MockUpstream:
+    """Counts requests and answers each one after a delay with the given status."""
+
+    def __init__(self, status_code: int = 200, delay: float = 0.2):
+        self.status_code = status_code
+        self.delay = delay
+        self.hits = 0
+        self.cancelled = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.hits += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, text="upstream failed")
+        return httpx.Response(200, json={"endpoint": request.url.path, "hit": self.hits})
+
+    def install(self):
+        """Makes the running loop's pooled client talk to this upstream."""
+        loop = asyncio.get_running_loop()
+        http_client._clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    # Empty in-memory cache, no rate limiting, nothing in flight from earlier tests
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ResponseCache(path=None))
+    monkeypatch.setattr(rate_limiter, "_limiter", rate_limiter.RateLimiter(rate=1000, burst=100))
+    monkeypatch.setattr(rapid_api, "_single_flight", rapid_api.SingleFlight())
+
+
+def test_concurrent_calls_share_one_upstream_request():
+    upstream = MockUpstream()
+
+    async def main():
+        upstream.install()
+        return await asyncio.gather(
+            *(call_rapid_api("/search/forsale", {"location": "Seattle, WA"}) for _ in range(CALLERS))
+        )
+
+    results = asyncio.run(main())
+    assert upstream.hits == 1
+    assert all(result == {"endpoint": "/search/forsale", "hit": 1} for result in results)
+
+
+def test_different_params_are_not_coalesced():
+    upstream = MockUpstream()
+
+    async def main():
+        upstream.install()
+        await asyncio.gather(
+            call_rapid_api("/search/forsale", {"location": "Seattle, WA"}),
+            call_rapid_api("/search/forsale", {"location": "Tacoma, WA"}),
+        )
+
+    asyncio.run(main())
+    assert upstream.hits == 2
+
+
+def test_error_fans_out_to_every_caller_and_is_not_kept():
+    upstream = MockUpstream(status_code=500)
+
+    async def main():
+        upstream.install()
+        results = await asyncio.gather(
+            *(call_rapid_api("/property/details", {"property_id": "1"}) for _ in range(CALLERS)),
+            return_exceptions=True,
+        )
+        # The failure is neither cached nor left in flight: the next call goes upstream again
+        with pytest.raises(RapidAPIError):
+            await call_rapid_api("/property/details", {"property_id": "1"})
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RapidAPIError) and result.status_code == 500 for result in results)
+    assert upstream.hits == 2
+
+
+def test_cancelling_one_caller_does_not_cancel_the_others():
+    upstream = MockUpstream()
+
+    async def main():
+        upstream.install()
+        tasks = [
+            asyncio.ensure_future(call_rapid_api("/suggestion", {"location": "Sea"})) for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        tasks[0].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1] == results[2] == {"endpoint": "/suggestion", "hit": 1}
+    assert upstream.hits == 1
+    assert upstream.cancelled == 0
+
+
+def test_cancelling_every_caller_cancels_the_upstream_request():
+    upstream = MockUpstream(delay=1.0)
+
+    async def main():
+        upstream.install()
+        tasks = [
+            asyncio.ensure_future(call_rapid_api("/suggestion", {"location": "Tac"})) for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        return rapid_api._single_flight.in_flight()
+
+    assert asyncio.run(main()) == 0
+    assert upstream.hits == 1
+    assert upstream.cancelled == 1
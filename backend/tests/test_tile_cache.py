@@ -0,0 +1,96 @@
+# Basemap tile cache against a mock tile server (httpx.MockTransport)
+import io
+import os
+
+import httpx
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from crews.research_crew.tile_cache import TileCache, add_cached_basemap
+
+TILE_URL = "https://tiles.example.test/{z}/{y}/{x}"
+
+
+def png_tile(size: int = 256) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), (200, 180, 150)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class MockTileServer:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        return httpx.Response(200, content=self.body)
+
+
+def make_cache(tmp_path, body: bytes = b"x" * 1000, **kwargs):
+    server = MockTileServer(body)
+    cache = TileCache(url=TILE_URL, root=str(tmp_path), **kwargs)
+    cache._client = httpx.Client(transport=httpx.MockTransport(server.handler))
+    return cache, server
+
+
+def test_miss_then_hit(tmp_path):
+    cache, server = make_cache(tmp_path)
+
+    assert cache.get(14, 2624, 5721) == b"x" * 1000
+    assert server.requests == ["/14/5721/2624"]
+    assert os.path.isfile(cache.path(14, 2624, 5721))
+
+    assert cache.get(14, 2624, 5721) == b"x" * 1000
+    assert len(server.requests) == 1
+
+
+def test_offline_never_requests(tmp_path):
+    online, _ = make_cache(tmp_path)
+    online.get(14, 2624, 5721)
+
+    cache, server = make_cache(tmp_path, offline=True)
+    assert cache.get(14, 2624, 5721) == b"x" * 1000  # seeded earlier
+    assert cache.get(14, 2625, 5721) is None
+    assert server.requests == []
+
+
+def test_offline_basemap_renders_from_disk_only(tmp_path):
+    cache, server = make_cache(tmp_path, body=png_tile(), offline=True)
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(-13616000, -13612000)
+    ax.set_ylim(6045000, 6049000)
+
+    add_cached_basemap(ax, -13616000, 6045000, -13612000, 6049000, cache=cache, zoom=14)
+    assert server.requests == []
+    assert len(ax.images) == 1
+
+
+def test_cached_only_skips_the_fetch(tmp_path):
+    cache, server = make_cache(tmp_path)
+    assert cache.get(14, 1, 1, cached_only=True) is None
+    assert server.requests == []
+
+
+def test_lru_eviction_stays_under_max_bytes(tmp_path):
+    cache, server = make_cache(tmp_path, max_bytes=5000)
+    for x in range(4):
+        cache.get(10, x, 0)
+    # Give the tiles distinct, increasing access times, then use tile 0 again
+    for x in range(4):
+        os.utime(cache.path(10, x, 0), (1000 + x, 1000 + x))
+    cache.get(10, 0, 0)
+
+    for x in range(4, 8):
+        cache.get(10, x, 0)
+
+    assert cache.size() <= cache.max_bytes
+    assert sum(os.path.getsize(p) for _, _, p in cache._tile_files()) == cache.size()
+    # Recently used tile 0 survives, the oldest untouched ones go first
+    assert os.path.isfile(cache.path(10, 0, 0))
+    assert not os.path.isfile(cache.path(10, 1, 0))
+    assert os.path.isfile(cache.path(10, 7, 0))
+    assert len(server.requests) == 8